@@ -1,3 +1,7 @@
+import atexit
+
 from .logger import LoggerUtil
 
 log_util = LoggerUtil()
+
+atexit.register(log_util.shutdown)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.aio
+~~~~~~~~~~~~~
+asyncio native logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import asyncio
+import logging
+import logging.handlers
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+
+class AsyncioQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, queue_obj: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        """
+        QueueHandler putting records into an asyncio.Queue without blocking the event loop
+        Records emitted from other threads are handed over to the event loop thread
+        Records are dropped and counted if the queue is full
+
+        """
+        super().__init__(queue_obj)
+
+        self.loop = loop
+        self.dropped = 0
+
+    def put(self, record: logging.LogRecord) -> None:
+        """Put the record into the queue, runs on the event loop thread"""
+
+        try:
+            self.queue.put_nowait(record)
+
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue a record, from any thread"""
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            self.put(record)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.put, record)
+
+
+class AsyncioListener:
+    def __init__(self, queue_obj: asyncio.Queue, handlers: List[logging.Handler], loop: asyncio.AbstractEventLoop,
+                 close_handler: Callable[[logging.Handler], None] = None):
+        """
+        Writer task handling the queued records in batches, handlers run on a single worker thread
+        so file and network writes never block the event loop
+
+        :param callable close_handler: called to close each handler when the listener is closed
+
+        """
+        self.queue = queue_obj
+        self.handlers = handlers
+        self.loop = loop
+        self.close_handler = close_handler or (lambda h: h.close())
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pynata-asyncio')
+        self.task = None
+
+    def start(self) -> None:
+        """Start the writer task on the event loop"""
+
+        self.task = self.loop.create_task(self._monitor())
+
+    async def _monitor(self) -> None:
+        """Take the queued records in batches and handle them on the worker thread"""
+
+        while True:
+            batch = [await self.queue.get()]
+
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            try:
+                await self.loop.run_in_executor(self.executor, self.handle_batch, batch)
+
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def handle_batch(self, batch: List[logging.LogRecord]) -> None:
+        """Pass the records to the handlers, respecting their logging levels"""
+
+        for record in batch:
+            for h in self.handlers:
+                if record.levelno >= h.level:
+                    h.handle(record)
+
+    def _flush_handlers(self) -> None:
+        """Flush the handlers, runs on the worker thread"""
+
+        for h in self.handlers:
+            h.flush()
+
+    def _close_handlers(self) -> None:
+        """Flush and close the handlers, runs on the worker thread"""
+
+        for h in self.handlers:
+            h.flush()
+            self.close_handler(h)
+
+    def close_handlers(self, handlers: List[logging.Handler]) -> None:
+        """
+        Close handlers removed from the listener on the worker thread, once the batch being handled is done
+        so a record being handled never reopens a closed handler
+
+        """
+        def close():
+            for h in handlers:
+                self.close_handler(h)
+
+        try:
+            self.executor.submit(close)
+        except RuntimeError:
+            close()
+
+    async def flush(self) -> None:
+        """Wait until every queued record is handled, then flush the handlers"""
+
+        await self.queue.join()
+        await self.loop.run_in_executor(self.executor, self._flush_handlers)
+
+    async def aclose(self) -> None:
+        """Handle the remaining records, stop the writer task and close the handlers"""
+
+        if self.task is not None:
+            await self.queue.join()
+
+            self.task.cancel()
+
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+            self.task = None
+
+            await self.loop.run_in_executor(self.executor, self._close_handlers)
+            self.executor.shutdown(wait=False)
+
+    def stop(self) -> None:
+        """
+        Synchronous close, for use outside of coroutines
+        On the event loop thread the close is scheduled as a task, from other threads it waits for the close
+        If the event loop is not running, the remaining records are handled on the calling thread
+
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            self.loop.create_task(self.aclose())
+
+        elif self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.aclose(), self.loop).result()
+
+        elif self.task is not None:
+            batch = []
+
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            if not self.loop.is_closed():
+                self.task.cancel()
+
+            self.task = None
+            self.executor.shutdown(wait=True)
+            self.handle_batch(batch)
+            self._close_handlers()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.binary
+~~~~~~~~~~~~~
+Compact binary log file handler with deferred formatting and decoder
+
+Usage: python -m pynata.logger.binary <filename> [--format FORMAT] [--date-format DATE_FORMAT]
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import sys
+import struct
+import logging
+import marshal
+import argparse
+from typing import Iterator, List
+
+from .common import LoggerCommon
+
+FILE_MAGIC = b'PYNBIN01'
+FRAME_HEADER = struct.Struct('<cI')
+RECORD_HEADER = struct.Struct('<dBIIIIQI')
+INTERN_HEADER = struct.Struct('<I')
+
+FRAME_TEMPLATE, FRAME_NAME, FRAME_SITE, FRAME_RECORD = b'T', b'N', b'S', b'R'
+
+exception_formatter = logging.Formatter()
+
+
+def dump_args(args) -> bytes:
+    """Serialize the record arguments, values marshal does not support are replaced by their str()"""
+
+    try:
+        return marshal.dumps(args)
+
+    except ValueError:
+        if isinstance(args, dict):
+            return dump_args({k: dump_args_value(v) for k, v in args.items()})
+
+        return marshal.dumps(tuple(dump_args_value(x) for x in args))
+
+
+def dump_args_value(value):
+    """Return the value if marshal supports it, otherwise its str()"""
+
+    try:
+        marshal.dumps(value)
+        return value
+
+    except ValueError:
+        return str(value)
+
+
+class BinaryFileHandler(logging.FileHandler):
+    max_interned = 65536
+
+    def __init__(self, filename: str, mode: str = 'a', delay: bool = False, flush_level: str = 'error'):
+        """
+        Writes records without string formatting, as framed binary entries:
+        creation time, level, interned logger name, interned message template, interned call site,
+        process and thread ids, marshalled arguments and the exception text, if any
+
+        Interned strings are written once as definition frames, use the decoder to render the records
+
+        :param str flush_level: records at or above this logging level flush the file
+
+        """
+        self.interned = {FRAME_TEMPLATE: {}, FRAME_NAME: {}, FRAME_SITE: {}}
+        self.flush_level = LoggerCommon.get_logging_level(flush_level)
+
+        super().__init__(filename, mode.replace('b', '') + 'b', encoding=None, delay=delay)
+
+    def _open(self):
+        """Open the file, writes the file header into an empty file and resets the interned values"""
+
+        stream = super()._open()
+
+        if stream.tell() == 0:
+            stream.write(FILE_MAGIC)
+
+        for table in self.interned.values():
+            table.clear()
+
+        return stream
+
+    def intern(self, kind: bytes, value, data: bytes) -> int:
+        """Return the id of an interned value, writes its definition frame on first use"""
+
+        table = self.interned[kind]
+        value_id = table.get(value)
+
+        if value_id is None:
+            if len(table) >= self.max_interned:
+                table.clear()
+
+            value_id = table[value] = len(table)
+            self.stream.write(FRAME_HEADER.pack(kind, INTERN_HEADER.size + len(data)) +
+                              INTERN_HEADER.pack(value_id) + data)
+
+        return value_id
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write the binary encoded record"""
+
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+
+            msg = record.msg if isinstance(record.msg, str) else str(record.msg)
+            site = (record.pathname, record.lineno, record.funcName)
+
+            template_id = self.intern(FRAME_TEMPLATE, msg, msg.encode('utf-8'))
+            name_id = self.intern(FRAME_NAME, record.name, record.name.encode('utf-8'))
+            site_id = self.intern(FRAME_SITE, site, marshal.dumps(site))
+
+            args = dump_args(record.args)
+
+            if record.exc_info and not record.exc_text:
+                record.exc_text = exception_formatter.formatException(record.exc_info)
+
+            exc = record.exc_text.encode('utf-8') if record.exc_text else b''
+
+            header = RECORD_HEADER.pack(record.created, record.levelno, name_id, template_id, site_id,
+                                        record.process or 0, record.thread or 0, len(args))
+
+            self.stream.write(FRAME_HEADER.pack(FRAME_RECORD, len(header) + len(args) + len(exc)) +
+                              header + args + exc)
+
+            if record.levelno >= self.flush_level:
+                self.flush()
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+
+def read_records(filename: str) -> Iterator[logging.LogRecord]:
+    """Yield the decoded records of a binary log file as logging.LogRecord instances"""
+
+    tables = {FRAME_TEMPLATE: {}, FRAME_NAME: {}, FRAME_SITE: {}}
+
+    with open(filename, 'rb') as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError('invalid binary log file - {}'.format(filename))
+
+        while True:
+            frame_header = f.read(FRAME_HEADER.size)
+
+            if len(frame_header) < FRAME_HEADER.size:
+                return
+
+            kind, size = FRAME_HEADER.unpack(frame_header)
+            data = f.read(size)
+
+            if len(data) < size:
+                return
+
+            if kind in tables:
+                value_id, raw = INTERN_HEADER.unpack_from(data)[0], data[INTERN_HEADER.size:]
+                tables[kind][value_id] = marshal.loads(raw) if kind == FRAME_SITE else raw.decode('utf-8')
+                continue
+
+            created, levelno, name_id, template_id, site_id, process, thread, args_size = \
+                RECORD_HEADER.unpack_from(data)
+
+            args_end = RECORD_HEADER.size + args_size
+            pathname, lineno, func_name = tables[FRAME_SITE][site_id]
+
+            yield logging.makeLogRecord({
+                'name': tables[FRAME_NAME][name_id], 'msg': tables[FRAME_TEMPLATE][template_id],
+                'args': marshal.loads(data[RECORD_HEADER.size:args_end]), 'levelno': levelno,
+                'levelname': logging.getLevelName(levelno), 'pathname': pathname,
+                'filename': os.path.basename(pathname), 'module': os.path.splitext(os.path.basename(pathname))[0],
+                'lineno': lineno, 'funcName': func_name, 'created': created, 'msecs': (created - int(created)) * 1000,
+                'process': process, 'thread': thread, 'exc_text': data[args_end:].decode('utf-8') or None
+            })
+
+
+def render_records(filename: str, log_format: str = None, log_date_format: str = None) -> Iterator[str]:
+    """
+    Yield the formatted records of a binary log file, defaults to the LoggerCommon formats, including "json"
+    A record whose message can not be rendered from its stored arguments is formatted with the message template
+    followed by the arguments
+
+    """
+    formatter = LoggerCommon.create_formatter(log_format or LoggerCommon.log_format)
+
+    if log_date_format:
+        formatter.datefmt = log_date_format
+
+    for record in read_records(filename):
+        try:
+            yield formatter.format(record)
+
+        except (TypeError, ValueError, KeyError):
+            record.msg, record.args = '{} {!r}'.format(record.msg, record.args), None
+            yield formatter.format(record)
+
+
+def main(args: List[str] = None) -> None:
+    """Command line decoder, prints the formatted records of a binary log file to stdout"""
+
+    parser = argparse.ArgumentParser(description='Print the records of a pynata binary log file')
+    parser.add_argument('filename', help='log file written by the binaryfile handler')
+    parser.add_argument('--format', default=LoggerCommon.log_format, help='log record format')
+    parser.add_argument('--date-format', default=LoggerCommon.log_date_format, help='log date format')
+
+    parsed = parser.parse_args(args)
+
+    for line in render_records(parsed.filename, parsed.format, parsed.date_format):
+        sys.stdout.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.buffered
+~~~~~~~~~~~~~
+Write coalescing file logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+import threading
+import logging.handlers
+from typing import Union
+
+from .common import LoggerCommon
+
+
+class BufferedHandlerMixin:
+    def __init__(self, *args, buffer_size: int = 65536, flush_interval: float = 1.0,
+                 flush_level: Union[str, int] = 'error', **kwargs):
+        """
+        Collects formatted records in memory and writes them to the stream with a single write call
+
+        :param int buffer_size: number of buffered characters which triggers a write
+        :param float flush_interval: maximum number of seconds a record is kept in the buffer, 0 disables the timer
+        :param str|int flush_level: records at or above this logging level trigger an immediate write
+
+        """
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.stream_bytes = None
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = LoggerCommon.get_logging_level(flush_level)
+
+        super().__init__(*args, **kwargs)
+
+        self._flush_event = threading.Event()
+        self._flush_thread = None
+
+        if flush_interval > 0:
+            self._flush_thread = threading.Thread(target=self._flush_monitor, daemon=True)
+            self._flush_thread.start()
+
+    def _flush_monitor(self) -> None:
+        """Write the buffer periodically, runs on a separate daemon thread"""
+
+        while not self._flush_event.wait(self.flush_interval):
+            self.flush()
+
+    def should_rollover(self, record: logging.LogRecord, data: str) -> bool:
+        """Return true if the file has to be rotated before the formatted record is buffered"""
+
+        return False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Format the record into the buffer, write the buffer if a threshold is reached"""
+
+        try:
+            data = self.format(record) + self.terminator
+
+            if self.should_rollover(record, data):
+                self.flush()
+                self.doRollover()
+
+            self.buffer.append(data)
+            self.buffer_bytes += len(data)
+
+            if self.buffer_bytes >= self.buffer_size or record.levelno >= self.flush_level:
+                self.flush()
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Write the buffered records with a single write call and flush the stream"""
+
+        with self.lock:
+            if self.buffer:
+                if self.stream is None:
+                    self.stream = self._open()
+
+                self.stream.write(''.join(self.buffer))
+
+                if self.stream_bytes is not None:
+                    self.stream_bytes += self.buffer_bytes
+
+                self.buffer.clear()
+                self.buffer_bytes = 0
+
+            if self.stream and hasattr(self.stream, 'flush'):
+                self.stream.flush()
+
+    def close(self) -> None:
+        """Stop the periodic flush and write the remaining buffer before closing the file"""
+
+        self._flush_event.set()
+
+        if self._flush_thread is not None and self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+
+        with self.lock:
+            if self.buffer:
+                self.flush()
+
+            super().close()
+
+
+class BufferedFileHandler(BufferedHandlerMixin, logging.FileHandler):
+    pass
+
+
+class BufferedRotatingFileHandler(BufferedHandlerMixin, logging.handlers.RotatingFileHandler):
+    def should_rollover(self, record: logging.LogRecord, data: str) -> bool:
+        """Size based rollover check, accounting for records which are not written yet"""
+
+        if self.maxBytes <= 0:
+            return False
+
+        if self.stream is None:
+            self.stream = self._open()
+            self.stream_bytes = None
+
+        if self.stream_bytes is None:
+            self.stream.seek(0, 2)
+            self.stream_bytes = self.stream.tell()
+
+        return self.stream_bytes + self.buffer_bytes + len(data) >= self.maxBytes
+
+    def doRollover(self) -> None:
+        """Rotate the file, the size of the new file is read on the next rollover check"""
+
+        super().doRollover()
+        self.stream_bytes = None
+
+
+class BufferedTimedRotatingFileHandler(BufferedHandlerMixin, logging.handlers.TimedRotatingFileHandler):
+    def should_rollover(self, record: logging.LogRecord, data: str) -> bool:
+        """Time based rollover check"""
+
+        return bool(self.shouldRollover(record))
@@ -11,12 +11,20 @@ Utility classes for Python built-in logging
 
 import os
 import logging
-from typing import Union
+from typing import List, Union
+
+from .formatter import FastFormatter, JsonFormatter
 
 
 class LoggerCommon:
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     log_date_format = '%Y-%m-%d %H:%M:%S'
+    log_fields = ['asctime', 'name', 'levelname', 'message']
+
+    fast_formatter = False
+    shared_formatter = None
+    collect_stats = True
+    level_generation = 0
 
     @staticmethod
     def get_default_logging_dir() -> str:
@@ -24,11 +32,38 @@ class LoggerCommon:
 
         return os.path.expanduser('~')
 
-    @classmethod
-    def get_formatter(cls) -> logging.Formatter:
-        """Return logging.Formatter instance"""
+    @staticmethod
+    def get_formatter(log_format: str = None, log_fields: List[str] = None) -> logging.Formatter:
+        """
+        Return logging.Formatter instance
+        If the fast formatter is enabled, a single compiled FastFormatter instance is shared between handlers
+
+        :param str log_format: override the log record format, "json" returns a JsonFormatter instance
+        :param list log_fields: override the record attributes serialized by JsonFormatter
+
+        """
+        if log_format is not None or log_fields is not None:
+            return LoggerCommon.create_formatter(log_format or LoggerCommon.log_format, log_fields)
+
+        if not LoggerCommon.fast_formatter and LoggerCommon.log_format != 'json':
+            return logging.Formatter(LoggerCommon.log_format, LoggerCommon.log_date_format)
+
+        if LoggerCommon.shared_formatter is None:
+            LoggerCommon.shared_formatter = LoggerCommon.create_formatter(LoggerCommon.log_format)
 
-        return logging.Formatter(cls.log_format, cls.log_date_format)
+        return LoggerCommon.shared_formatter
+
+    @staticmethod
+    def create_formatter(log_format: str, log_fields: List[str] = None) -> logging.Formatter:
+        """Return a new formatter instance for the log record format"""
+
+        if log_format == 'json':
+            return JsonFormatter(log_fields or LoggerCommon.log_fields, LoggerCommon.log_date_format)
+
+        elif LoggerCommon.fast_formatter:
+            return FastFormatter(log_format, LoggerCommon.log_date_format)
+
+        return logging.Formatter(log_format, LoggerCommon.log_date_format)
 
     @staticmethod
     def get_logging_level(log_level: Union[str, int, bool, type(None)]) -> int:
@@ -55,14 +90,46 @@ class LoggerCommon:
 
         return True if name in logging.Logger.manager.loggerDict.keys() else False
 
-    @classmethod
-    def set_log_format(cls, format_str: str) -> None:
-        """Sets the log record format that will be used with logging.Formatter instances"""
+    @staticmethod
+    def invalidate_level_cache() -> None:
+        """Invalidate the handler levels cached by LazyLogger.is_enabled, called on level and handler changes"""
 
-        cls.log_format = format_str
+        LoggerCommon.level_generation += 1
 
-    @classmethod
-    def set_log_date_format(cls, format_str: str) -> None:
+    @staticmethod
+    def set_collect_stats(enabled: bool = True) -> None:
+        """Enables runtime metrics collection for handlers created afterwards"""
+
+        LoggerCommon.collect_stats = enabled
+
+    @staticmethod
+    def set_fast_formatter(enabled: bool = True) -> None:
+        """Enables the shared, compiled FastFormatter for handlers created afterwards"""
+
+        LoggerCommon.fast_formatter = enabled
+        LoggerCommon.shared_formatter = None
+
+    @staticmethod
+    def set_log_fields(fields: List[str]) -> None:
+        """Sets the record attributes serialized by the "json" log record format"""
+
+        LoggerCommon.log_fields = list(fields)
+        LoggerCommon.shared_formatter = None
+
+    @staticmethod
+    def set_log_format(format_str: str) -> None:
+        """
+        Sets the log record format that will be used with logging.Formatter instances
+        Use "json" to format each record as a single line JSON object
+
+        """
+
+        LoggerCommon.log_format = format_str
+        LoggerCommon.shared_formatter = None
+
+    @staticmethod
+    def set_log_date_format(format_str: str) -> None:
         """Sets the log date record format that will be used with logging.Formatter instances"""
 
-        cls.log_date_format = format_str
+        LoggerCommon.log_date_format = format_str
+        LoggerCommon.shared_formatter = None
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.context
+~~~~~~~~~~~~~
+Contextual log record fields bound with contextvars
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+import contextlib
+import contextvars
+from typing import Callable, Iterator
+
+context_fields = contextvars.ContextVar('pynata_context_fields', default=None)
+
+reserved_fields = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'context_fields'}
+
+
+class ContextRecordFactory:
+    def __init__(self, base_factory: Callable[..., logging.LogRecord]):
+        """
+        LogRecord factory setting the fields bound in the current context as record attributes
+        The bound fields are also available as a dictionary in the "context_fields" record attribute
+
+        :param callable base_factory: factory creating the records, the previously installed factory
+
+        """
+        self.base_factory = base_factory
+        self.defaults = {}
+
+    def __call__(self, *args, **kwargs) -> logging.LogRecord:
+        record = self.base_factory(*args, **kwargs)
+        fields = context_fields.get()
+
+        if self.defaults:
+            record.__dict__.update(self.defaults)
+
+        if fields is not None:
+            record.__dict__.update(fields)
+            record.context_fields = fields
+
+        return record
+
+
+def install_record_factory() -> ContextRecordFactory:
+    """Install the context record factory, once, wrapping the current LogRecord factory"""
+
+    factory = logging.getLogRecordFactory()
+
+    if not isinstance(factory, ContextRecordFactory):
+        factory = ContextRecordFactory(factory)
+        logging.setLogRecordFactory(factory)
+
+    return factory
+
+
+def validate_fields(fields: dict) -> None:
+    """Raise ValueError for field names clashing with LogRecord attributes"""
+
+    for name in fields:
+        if name in reserved_fields:
+            raise ValueError('invalid context field - {}'.format(name))
+
+
+def bind_context(**fields) -> contextvars.Token:
+    """
+    Bind fields to the records created in the current context, thread or asyncio task
+    Returns a token for unbind_context, which restores the previously bound fields
+
+    """
+    validate_fields(fields)
+    install_record_factory()
+
+    current = context_fields.get()
+
+    return context_fields.set(dict(current, **fields) if current else fields)
+
+
+def unbind_context(token: contextvars.Token) -> None:
+    """Restore the fields bound before the bind_context call which returned the token"""
+
+    context_fields.reset(token)
+
+
+def clear_context() -> None:
+    """Remove every field bound in the current context"""
+
+    context_fields.set(None)
+
+
+def get_context() -> dict:
+    """Return the fields bound in the current context"""
+
+    return dict(context_fields.get() or {})
+
+
+@contextlib.contextmanager
+def bound_context(**fields) -> Iterator[dict]:
+    """Bind fields for the duration of the with block, yields the bound fields"""
+
+    token = bind_context(**fields)
+
+    try:
+        yield context_fields.get()
+    finally:
+        unbind_context(token)
+
+
+def set_context_defaults(**defaults) -> None:
+    """Set values of the fields not bound in the current context, for log formats referencing them"""
+
+    validate_fields(defaults)
+    install_record_factory().defaults = defaults
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.durable
+~~~~~~~~~~~~~
+File logging handlers with a configurable fsync policy and group commit
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import re
+import sys
+import logging
+import threading
+import logging.handlers
+from typing import Tuple, Union
+
+from .common import LoggerCommon
+
+
+class DurableHandlerMixin:
+    records_pattern = re.compile(r'^\s*(\d+)\s*records?\s*$')
+    interval_pattern = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s)\s*$')
+
+    def __init__(self, *args, durability: Union[str, int, dict] = 'none', **kwargs):
+        """
+        Flushes records to disk with fsync according to the durability policy
+        Records are synced with group commit, a single fsync covers every record written before it started,
+        concurrent writers waiting for durability share it
+
+        :param str|int|dict durability:
+            "none" - no fsync, records are written to the operating system only
+            "always" - fsync after every record
+            a record count, e.g. 100 or "100 records" - fsync after every N records, the Nth writer waits for it
+            an interval, e.g. "200ms" or "2s" - fsync from a background thread, writers never wait
+            a logging level, e.g. "error" - fsync after records at or above the level, the writer waits for it
+            a dictionary combining "records", "interval_ms" and "level", e.g. {"interval_ms": 500, "level": "error"}
+
+        """
+        self.sync_records, self.sync_interval, self.sync_level = self.parse_durability(durability)
+
+        self.write_seq = 0
+        self.sync_target = 0
+        self.synced_seq = 0
+        self.syncing = False
+        self.sync_cond = threading.Condition(threading.Lock())
+
+        super().__init__(*args, **kwargs)
+
+        self._sync_event = threading.Event()
+        self._sync_thread = None
+
+        if self.sync_interval:
+            self._sync_thread = threading.Thread(target=self._sync_monitor, daemon=True)
+            self._sync_thread.start()
+
+    @classmethod
+    def parse_durability(cls, durability: Union[str, int, dict]) -> Tuple[int, float, Union[int, None]]:
+        """Return the fsync record count, interval in seconds and logging level, 0 or None if not used"""
+
+        if isinstance(durability, dict):
+            unknown = set(durability) - {'records', 'interval_ms', 'level'}
+
+            if unknown:
+                raise ValueError('invalid durability - {}'.format(durability))
+
+            records, interval = int(durability.get('records', 0)), float(durability.get('interval_ms', 0)) / 1000
+            level = LoggerCommon.get_logging_level(durability['level']) if 'level' in durability else None
+
+            if records < 0 or interval < 0:
+                raise ValueError('invalid durability - {}'.format(durability))
+
+            return records, interval, level
+
+        if isinstance(durability, int) and not isinstance(durability, bool) and durability > 0:
+            return durability, 0.0, None
+
+        if not isinstance(durability, str):
+            raise ValueError('invalid durability - {}'.format(durability))
+
+        if durability.lower() == 'none':
+            return 0, 0.0, None
+
+        if durability.lower() == 'always':
+            return 1, 0.0, None
+
+        match = cls.records_pattern.match(durability)
+
+        if match is not None and int(match.group(1)) > 0:
+            return int(match.group(1)), 0.0, None
+
+        match = cls.interval_pattern.match(durability)
+
+        if match is not None and float(match.group(1)) > 0:
+            return 0, float(match.group(1)) / (1000 if match.group(2) == 'ms' else 1), None
+
+        return 0, 0.0, LoggerCommon.get_logging_level(durability)
+
+    def _sync_monitor(self) -> None:
+        """Sync the written records periodically, runs on a separate daemon thread"""
+
+        while not self._sync_event.wait(self.sync_interval):
+            if self.write_seq > self.synced_seq:
+                try:
+                    self.sync(self.write_seq)
+                except OSError as e:
+                    sys.stderr.write('pynata: fsync failed - {} - {}\n'.format(self.baseFilename, e))
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """Filter and emit the record, then wait for the fsync if the durability policy requires it"""
+
+        rv = self.filter(record)
+
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+
+        if rv:
+            with self.lock:
+                self.emit(record)
+                self.write_seq += 1
+                seq = self.write_seq
+
+            if (self.sync_level is not None and record.levelno >= self.sync_level) or \
+                    (self.sync_records and seq - self.sync_target >= self.sync_records):
+                try:
+                    self.sync(seq)
+                except OSError:
+                    self.handleError(record)
+
+        return rv
+
+    def sync(self, seq: int) -> None:
+        """
+        Wait until the records up to the sequence number are synced to disk
+        If no fsync is running one is started for every record written so far, otherwise the running one is
+        waited for, and a new one started if it did not cover the sequence number
+
+        """
+        with self.sync_cond:
+            while self.synced_seq < seq:
+                if self.syncing:
+                    self.sync_cond.wait()
+                    continue
+
+                self.syncing = True
+                self.sync_cond.release()
+
+                target, fd = self.synced_seq, None
+
+                try:
+                    with self.lock:
+                        target = self.write_seq
+                        self.sync_target = max(self.sync_target, target)
+
+                        if self.stream is not None:
+                            fd = os.dup(self.stream.fileno())
+
+                    if fd is not None:
+                        os.fsync(fd)
+
+                finally:
+                    if fd is not None:
+                        os.close(fd)
+
+                    self.sync_cond.acquire()
+                    self.syncing = False
+                    self.synced_seq = max(self.synced_seq, target)
+                    self.sync_cond.notify_all()
+
+    def sync_stream(self) -> None:
+        """Flush and fsync the open stream if it holds unsynced records, called with the handler lock held"""
+
+        if self.stream is not None and self.write_seq > self.synced_seq:
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+
+    def close(self) -> None:
+        """Stop the periodic sync, sync the remaining records and close the file"""
+
+        self._sync_event.set()
+
+        if self._sync_thread is not None and self._sync_thread is not threading.current_thread():
+            self._sync_thread.join()
+
+        with self.lock:
+            try:
+                self.sync_stream()
+            finally:
+                super().close()
+
+
+class DurableFileHandler(DurableHandlerMixin, logging.FileHandler):
+    pass
+
+
+class DurableWatchedFileHandler(DurableHandlerMixin, logging.handlers.WatchedFileHandler):
+    def reopenIfNeeded(self) -> None:
+        """Reopen the file if it was moved or deleted, the unsynced records of the old file are synced first"""
+
+        try:
+            sres = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            sres = None
+
+        if self.stream is not None and (not sres or sres.st_dev != self.dev or sres.st_ino != self.ino):
+            self.sync_stream()
+            self.stream.close()
+            self.stream = None
+            self.stream = self._open()
+            self._statstream()
+
+
+class DurableRotatingFileHandler(DurableHandlerMixin, logging.handlers.RotatingFileHandler):
+    def doRollover(self) -> None:
+        """Sync the unsynced records before the file is rotated"""
+
+        self.sync_stream()
+        super().doRollover()
+
+
+class DurableTimedRotatingFileHandler(DurableHandlerMixin, logging.handlers.TimedRotatingFileHandler):
+    def doRollover(self) -> None:
+        """Sync the unsynced records before the file is rotated"""
+
+        self.sync_stream()
+        super().doRollover()
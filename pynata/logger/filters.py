@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.filters
+~~~~~~~~~~~~~
+Logging filters for reducing log volume
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import re
+import time
+import random
+import logging
+import threading
+from typing import Tuple, Union
+
+
+class SummaryFilter(logging.Filter):
+    summary_msg = '%d records suppressed by %s in the last %.1f seconds'
+
+    def __init__(self, handler: logging.Handler, summary_interval: float = 60.0):
+        """
+        Base class for filters which drop records and report the number of dropped records
+
+        A summary window starts with the first suppressed record, when it ends a WARNING record reporting
+        the suppressed records is handled by the handler, the last window is reported when the handler closes
+
+        """
+        super().__init__()
+
+        self.handler = handler
+        self.summary_interval = summary_interval
+        self.suppressed = 0
+        self.suppressed_name = None
+        self.window_start = time.monotonic()
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def allow(self, now: float) -> bool:
+        """Return true if the record should be handled"""
+
+        raise NotImplementedError
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return true if the record should be handled, the first suppressed record starts a summary window"""
+
+        if getattr(record, 'suppressed', None) is not None:
+            return True
+
+        now = time.monotonic()
+
+        with self.lock:
+            allowed = self.allow(now)
+
+            if not allowed:
+                self.suppressed += 1
+                self.suppressed_name = record.name
+
+                if self.timer is None:
+                    self.window_start = now
+                    self.timer = threading.Timer(self.summary_interval, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+
+        return allowed
+
+    def cancel_timer(self) -> None:
+        """Cancel the pending end of the summary window"""
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def close(self) -> None:
+        """Report the records suppressed in the current window, called before the handler is closed"""
+
+        self.flush()
+
+    def flush(self) -> None:
+        """End the summary window, reports the records suppressed during it"""
+
+        with self.lock:
+            suppressed, name, window = self.suppressed, self.suppressed_name, time.monotonic() - self.window_start
+            self.suppressed = 0
+            self.cancel_timer()
+
+        if suppressed:
+            self.handle_summary(name, suppressed, window)
+
+    def handle_summary(self, name: str, suppressed: int, window: float) -> None:
+        """Pass a record reporting the number of suppressed records to the handler"""
+
+        summary = logging.LogRecord(name, logging.WARNING, __file__, 0, self.summary_msg,
+                                    (suppressed, type(self).__name__, window), None)
+        summary.suppressed = suppressed
+
+        self.handler.handle(summary)
+
+
+class SampleFilter(SummaryFilter):
+    def __init__(self, handler: logging.Handler, sample_rate: float, summary_interval: float = 60.0):
+        """
+        Keeps a random sample of the records
+
+        :param float sample_rate: ratio of records to be kept, between 0 and 1
+
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError('invalid sample rate - {}'.format(sample_rate))
+
+        super().__init__(handler, summary_interval)
+
+        self.sample_rate = sample_rate
+
+    def allow(self, now: float) -> bool:
+        """Return true for a random sample of the records"""
+
+        return random.random() < self.sample_rate
+
+
+class RateLimitFilter(SummaryFilter):
+    rate_pattern = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*/\s*(s|m|h)(?:\s+(?:with\s+)?burst\s+(\d+))?\s*$')
+    rate_units = {'s': 1, 'm': 60, 'h': 3600}
+
+    def __init__(self, handler: logging.Handler, rate_limit: Union[str, int, float], burst: int = None,
+                 summary_interval: float = 60.0):
+        """
+        Token bucket rate limiter
+
+        :param str|int|float rate_limit: records per second, or a string such as "100/s", "6000/m", "100/s burst 500"
+        :param int burst: maximum number of records allowed at once - defaults to the per second rate
+
+        """
+        super().__init__(handler, summary_interval)
+
+        self.rate, parsed_burst = self.parse_rate_limit(rate_limit)
+        self.burst = burst or parsed_burst or max(1, int(self.rate))
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+
+    @classmethod
+    def parse_rate_limit(cls, rate_limit: Union[str, int, float]) -> Tuple[float, Union[int, None]]:
+        """Return the number of records per second and the burst size, if present"""
+
+        if isinstance(rate_limit, (int, float)) and not isinstance(rate_limit, bool) and rate_limit > 0:
+            return float(rate_limit), None
+
+        match = cls.rate_pattern.match(rate_limit) if isinstance(rate_limit, str) else None
+
+        if match is None or float(match.group(1)) <= 0:
+            raise ValueError('invalid rate limit - {}'.format(rate_limit))
+
+        burst = int(match.group(3)) if match.group(3) else None
+
+        return float(match.group(1)) / cls.rate_units[match.group(2)], burst
+
+    def allow(self, now: float) -> bool:
+        """Return true if a token is available in the bucket"""
+
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        return False
+
+
+class RepeatFilter(logging.Filter):
+    repeat_msg = 'last message repeated %d times'
+
+    def __init__(self, handler: logging.Handler, repeat_timeout: float = 10.0):
+        """
+        Holds back consecutive records with the same logger name, level, message template and arguments
+
+        A single record reporting the number of repeats is handled by the handler when the run of
+        repeated records ends, or when a run lasts longer than the timeout
+
+        :param float repeat_timeout: maximum number of seconds repeats are held back
+
+        """
+        super().__init__()
+
+        self.handler = handler
+        self.repeat_timeout = repeat_timeout
+        self.last_record = None
+        self.repeats = 0
+        self.timer = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def is_repeat(record: logging.LogRecord, last_record: logging.LogRecord) -> bool:
+        """Return true if the record repeats the previous record, arguments which can not be compared never repeat"""
+
+        if last_record is None or record.levelno != last_record.levelno or record.name != last_record.name:
+            return False
+
+        try:
+            return bool(record.msg == last_record.msg and record.args == last_record.args)
+
+        except Exception:
+            return False
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return false for repeated records, reports the number of repeats when the run ends"""
+
+        if getattr(record, 'repeated', None) is not None:
+            return True
+
+        with self.lock:
+            if self.is_repeat(record, self.last_record):
+                self.repeats += 1
+
+                if self.timer is None:
+                    self.timer = threading.Timer(self.repeat_timeout, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+
+                return False
+
+            last_record, repeats = self.last_record, self.repeats
+            self.last_record, self.repeats = record, 0
+            self.cancel_timer()
+
+        if repeats:
+            self.handle_repeats(last_record, repeats)
+
+        return True
+
+    def cancel_timer(self) -> None:
+        """Cancel the pending timeout"""
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def close(self) -> None:
+        """Report the repeats held back, called before the handler is closed"""
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Report the repeats held back so far, the run continues with the next repeated record"""
+
+        with self.lock:
+            last_record, repeats = self.last_record, self.repeats
+            self.repeats = 0
+            self.cancel_timer()
+
+        if repeats:
+            self.handle_repeats(last_record, repeats)
+
+    def handle_repeats(self, record: logging.LogRecord, repeats: int) -> None:
+        """Pass a record reporting the number of repeats to the handler"""
+
+        summary = logging.LogRecord(record.name, record.levelno, record.pathname, record.lineno, self.repeat_msg,
+                                    (repeats,), None)
+        summary.repeated = repeats
+
+        self.handler.handle(summary)
+
+
+def install_close(handler: logging.Handler) -> None:
+    """Wrap the close method of a handler instance, the records held back by its filters are handled first"""
+
+    if getattr(handler, 'close_unfiltered', None) is not None:
+        return
+
+    close = handler.close_unfiltered = handler.close
+
+    def close_filters():
+        for f in list(handler.filters):
+            if isinstance(f, (RepeatFilter, SummaryFilter)):
+                f.close()
+
+        close()
+
+    handler.close = close_filters
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.formatter
+~~~~~~~~~~~~~
+High throughput logging formatters
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import re
+import time
+import logging
+import operator
+import functools
+from typing import Callable, Iterable
+
+
+def load_json_dumps() -> Callable[[dict], str]:
+    """Return the serializer function of the fastest installed JSON library, orjson, ujson or json"""
+
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        import json
+        fallback = functools.partial(json.dumps, ensure_ascii=False)
+
+        def dumps(obj: dict) -> str:
+            """Serialize with orjson, with json for the values it rejects, such as integers over 64 bits"""
+
+            try:
+                return orjson.dumps(obj).decode('utf-8')
+            except TypeError:
+                return fallback(obj)
+
+        return dumps
+
+    try:
+        import ujson
+        return functools.partial(ujson.dumps, ensure_ascii=False)
+    except ImportError:
+        pass
+
+    import json
+    return functools.partial(json.dumps, ensure_ascii=False)
+
+
+class CachedTimeFormatter(logging.Formatter):
+    def __init__(self, fmt: str = None, datefmt: str = None):
+        """logging.Formatter which calls strftime at most once per second"""
+
+        super().__init__(fmt, datefmt)
+
+        self._time_cache = (None, None)
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        """Return the creation time of the record, strftime is called at most once per second"""
+
+        second = int(record.created)
+        cached_second, cached_str = self._time_cache
+
+        if cached_second != second:
+            ct = self.converter(record.created)
+            cached_str = time.strftime(datefmt or self.default_time_format, ct)
+            self._time_cache = (second, cached_str)
+
+        if datefmt is None and self.default_msec_format:
+            return self.default_msec_format % (cached_str, record.msecs)
+
+        return cached_str
+
+
+class FastFormatter(CachedTimeFormatter):
+    field_pattern = re.compile(r'%%|%\((\w+)\)([#0+ -]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa])')
+
+    def __init__(self, fmt: str = None, datefmt: str = None):
+        """
+        logging.Formatter compiled once from a %-style format string
+
+        Record attributes are collected with a single attrgetter call and interpolated positionally,
+        the rendered date is cached for the current second
+
+        """
+        super().__init__(fmt, datefmt)
+
+        self._fields, self._positional = self.compile_format(self._fmt)
+        self._getter = operator.attrgetter(*self._fields) if self._fields else None
+
+    @classmethod
+    def compile_format(cls, fmt: str) -> tuple:
+        """
+        Return the record attribute names and the positional format string for a %-style format string
+        Escaped "%%" sequences are kept as they are
+
+        """
+
+        fields = []
+
+        def replace(match):
+            if match.group(1) is None:
+                return match.group(0)
+
+            fields.append(match.group(1))
+            return '%' + match.group(2)
+
+        positional = cls.field_pattern.sub(replace, fmt)
+
+        return tuple(fields), positional
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """Interpolate the compiled format string with the record attributes"""
+
+        if self._getter is None:
+            return self._positional % ()
+
+        values = self._getter(record)
+
+        return self._positional % (values if len(self._fields) > 1 else (values,))
+
+
+class JsonFormatter(CachedTimeFormatter):
+    default_fields = ('asctime', 'name', 'levelname', 'message')
+
+    def __init__(self, fields: Iterable[str] = None, datefmt: str = None):
+        """
+        Formats each record as a single line JSON object
+
+        :param list fields: record attributes to be serialized, defaults to asctime, name, levelname, message
+            exception and stack information is added as "exc_text" and "stack_info" when present,
+            fields bound with bind_context are added as well
+
+        """
+        super().__init__('%(message)s', datefmt)
+
+        self.fields = tuple(fields or self.default_fields)
+        self.uses_time = 'asctime' in self.fields
+        self.dumps = load_json_dumps()
+
+    def usesTime(self) -> bool:
+        """Return true if the record creation time is serialized"""
+
+        return self.uses_time
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Return the JSON serialized record"""
+
+        record.message = record.getMessage()
+
+        if self.uses_time:
+            record.asctime = self.formatTime(record, self.datefmt)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        data = {}
+
+        for field in self.fields:
+            value = getattr(record, field, None)
+            data[field] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+        context_fields = getattr(record, 'context_fields', None)
+
+        if context_fields:
+            for field, value in context_fields.items():
+                if field not in data:
+                    data[field] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+        if record.exc_text:
+            data['exc_text'] = record.exc_text
+
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+
+        return self.dumps(data)
@@ -9,48 +9,137 @@ Utility classes for Python built-in logging
 :license: MPL 2.0, see LICENSE for more details
 """
 
+import os
 import logging
-import logging.handlers
+import importlib
+import weakref
+import threading
 from typing import List, Union
 
 from .common import LoggerCommon
+from .stats import HandlerStats
 
 
 class LoggerHandlerUtil(LoggerCommon):
     handler_mapping = {
-        'stream': logging.StreamHandler, 'file': logging.FileHandler, 'null': logging.NullHandler,
-        'watchedfile': logging.handlers.WatchedFileHandler, 'rotatingfile': logging.handlers.RotatingFileHandler,
-        'timedrotatingfile': logging.handlers.TimedRotatingFileHandler, 'socket': logging.handlers.SocketHandler,
-        'datagram': logging.handlers.DatagramHandler, 'syslog': logging.handlers.SysLogHandler,
-        'nteventlog': logging.handlers.NTEventLogHandler, 'smtp': logging.handlers.SMTPHandler,
-        'memory': logging.handlers.MemoryHandler, 'http': logging.handlers.HTTPHandler,
-        'queue': logging.handlers.QueueHandler
+        'stream': 'logging.StreamHandler', 'file': 'logging.FileHandler', 'null': 'logging.NullHandler',
+        'watchedfile': 'logging.handlers.WatchedFileHandler', 'rotatingfile': 'logging.handlers.RotatingFileHandler',
+        'timedrotatingfile': 'logging.handlers.TimedRotatingFileHandler',
+        'socket': 'logging.handlers.SocketHandler', 'datagram': 'logging.handlers.DatagramHandler',
+        'syslog': 'logging.handlers.SysLogHandler', 'nteventlog': 'logging.handlers.NTEventLogHandler',
+        'smtp': 'logging.handlers.SMTPHandler', 'memory': 'logging.handlers.MemoryHandler',
+        'http': 'logging.handlers.HTTPHandler', 'queue': 'logging.handlers.QueueHandler',
+        'bufferedfile': 'pynata.logger.buffered.BufferedFileHandler',
+        'bufferedrotatingfile': 'pynata.logger.buffered.BufferedRotatingFileHandler',
+        'bufferedtimedrotatingfile': 'pynata.logger.buffered.BufferedTimedRotatingFileHandler',
+        'gzrotatingfile': 'pynata.logger.rotating.GzRotatingFileHandler',
+        'gztimedrotatingfile': 'pynata.logger.rotating.GzTimedRotatingFileHandler',
+        'mmapring': 'pynata.logger.mmapring.MmapRingHandler',
+        'ringbuffer': 'pynata.logger.ringbuffer.RingBufferHandler',
+        'batchhttp': 'pynata.logger.shipper.BatchHTTPHandler',
+        'resilientsocket': 'pynata.logger.resilient.ResilientSocketHandler',
+        'resilientdatagram': 'pynata.logger.resilient.ResilientDatagramHandler',
+        'binaryfile': 'pynata.logger.binary.BinaryFileHandler',
+        'shardedfile': 'pynata.logger.sharded.ShardedFileHandler'
     }
 
-    def setup_handlers(self, config: Union[dict, bool]) -> List[Union[logging.Handler, logging.NullHandler]]:
+    durable_handler_mapping = {
+        'file': 'pynata.logger.durable.DurableFileHandler',
+        'watchedfile': 'pynata.logger.durable.DurableWatchedFileHandler',
+        'rotatingfile': 'pynata.logger.durable.DurableRotatingFileHandler',
+        'timedrotatingfile': 'pynata.logger.durable.DurableTimedRotatingFileHandler'
+    }
+
+    indexed_handler_mapping = {
+        'rotatingfile': 'pynata.logger.indexed.IndexedRotatingFileHandler',
+        'timedrotatingfile': 'pynata.logger.indexed.IndexedTimedRotatingFileHandler'
+    }
+
+    durable_indexed_handler_mapping = {
+        'rotatingfile': 'pynata.logger.indexed.DurableIndexedRotatingFileHandler',
+        'timedrotatingfile': 'pynata.logger.indexed.DurableIndexedTimedRotatingFileHandler'
+    }
+
+    handler_classes = {}
+    entry_point_group = 'pynata.handlers'
+    entry_points_loaded = False
+
+    handler_registry = {}
+    handler_refs = {}
+    registry_lock = threading.RLock()
+    created_handlers = weakref.WeakSet()
+
+    def setup_handlers(self, config: Union[dict, bool],
+                       shared: bool = False) -> List[Union[logging.Handler, logging.NullHandler]]:
         """
         Returns a list of logging handler instances
         If no configuration is provided, a logging.NullHandler is returned
 
+        :param bool shared:
+            reuse the registered handler instance created with an identical handler type and configuration
+            shared handlers are reference counted and closed when removed from the last Logger
+
         :param dict config:
             defines logging handler instance(s) to be created
             dictionary key: defines handler type, key value: defines parameters for handler instance
             default logging level: "warning", can be overridden with "log_level"
+            default log record format: LoggerCommon.log_format, or "json" for the 'batchhttp' type,
+                can be overridden with "format"
+                "json" formats records as JSON objects, the serialized attributes can be set with "fields"
+            optional record filters: "sample_rate" keeps a random ratio of the records,
+                "rate_limit" limits records per second, e.g. 100, "100/s", "6000/m" or "100/s burst 500",
+                suppressed records are reported every "summary_interval" seconds - defaults to 60
+                "collapse_repeats" holds back consecutive identical records and reports the number of repeats
+                when the run ends, or every "repeat_timeout" seconds - defaults to 10
+            a "target" handler, e.g. for 'memory' and 'ringbuffer', can be defined as a nested handler configuration
+            'file', 'watchedfile', 'rotatingfile' and 'timedrotatingfile' accept a "durability" fsync policy:
+                "none", "always", a record count e.g. "100 records", an interval e.g. "200ms", a logging level
+                e.g. "error", or a dictionary combining "records", "interval_ms" and "level" - defaults to "none"
+            'rotatingfile' and 'timedrotatingfile' maintain a sidecar time index of every generation with "index":
+                true, or a dictionary of "records", "kb" and "level" - defaults to false,
+                query it with pynata.logger.indexed.query or python -m pynata.logger.indexed
 
             valid key names: 'stream', 'file', 'null', 'watchedfile', 'rotatingfile', 'timedrotatingfile', 'socket',
-                'datagram', 'syslog', 'nteventlog', 'smtp', 'memory', 'http', 'queue'
+                'datagram', 'syslog', 'nteventlog', 'smtp', 'memory', 'http', 'queue', 'bufferedfile',
+                'bufferedrotatingfile', 'bufferedtimedrotatingfile', 'gzrotatingfile', 'gztimedrotatingfile',
+                'mmapring', 'ringbuffer', 'batchhttp', 'resilientsocket', 'resilientdatagram', 'binaryfile',
+                'shardedfile',
+                types added with register_handler and types of the "pynata.handlers" entry point group
 
             example: {
                 "stream": {"log_level": "debug"},
                 "file": {"filename": "/var/tmp/logfile", "log_level": "warning"},
-                "rotatingfile": {"filename": "/var/tmp/logfile"}
+                "rotatingfile": {"filename": "/var/tmp/logfile"},
+                "watchedfile": {"filename": "/var/tmp/logfile.json", "format": "json", "fields": ["name", "message"]},
+                "syslog": {"rate_limit": "100/s burst 500", "sample_rate": 0.5, "collapse_repeats": True},
+                "timedrotatingfile": {"filename": "/var/tmp/audit", "durability": {"records": 100, "level": "error"}},
+                "rotatingfile": {"filename": "/var/tmp/app", "maxBytes": 10485760, "backupCount": 5, "index": True},
+                "ringbuffer": {"capacity": 500, "partition": "thread", "target": {"file": {"filename": "/var/tmp/log"}}}
             }
 
         """
         handlers = []
 
+        for handler_type, config in self.iter_handler_configs(config):
+            if shared:
+                handlers.append(self.get_shared_handler(handler_type, config))
+            else:
+                handlers.append(self.create_handler(handler_type, config))
+
+        return handlers
+
+    @staticmethod
+    def iter_handler_configs(config: Union[dict, bool]) -> List[tuple]:
+        """
+        Return the handler type and configuration pairs of a handler configuration, see setup_handlers
+        Each handler configuration is a copy, the caller's configuration can be reused
+
+        """
+
+        pairs = []
+
         if not isinstance(config, (dict, bool)):
-            return handlers
+            return pairs
 
         elif isinstance(config, bool):
             config = {'stream': [{'log_level': 'debug' if config else 'warning'}]}
@@ -62,16 +151,132 @@ class LoggerHandlerUtil(LoggerCommon):
             elif isinstance(handler_configs, (list, tuple)):
                 handler_configs = [{}] if len(handler_configs) == 0 else handler_configs
 
-            for config in tuple(handler_configs):
-                log_level = config.pop('log_level', 'notset')
-                handler = self.get_handler(handler_type, **config)
+            pairs.extend((handler_type, dict(x)) for x in tuple(handler_configs))
 
-                self.set_handler_log_level(handler, log_level)
-                handler.setFormatter(self.get_formatter())
+        return pairs
 
-                handlers.append(handler)
+    def create_handler(self, handler_type: str, config: dict) -> logging.Handler:
+        """Return a new handler instance with logging level and formatter set from the handler configuration"""
 
-        return handlers
+        handler_spec = self.get_handler_spec(handler_type, config)
+
+        log_level = config.pop('log_level', 'notset')
+        log_format, log_fields = config.pop('format', None), config.pop('fields', None)
+        sample_rate, rate_limit = config.pop('sample_rate', None), config.pop('rate_limit', None)
+        summary_interval = config.pop('summary_interval', 60.0)
+        collapse_repeats, repeat_timeout = config.pop('collapse_repeats', False), config.pop('repeat_timeout', 10.0)
+
+        if isinstance(config.get('target'), dict):
+            config['target'] = self.setup_handlers(config['target'])[0]
+
+        if config.get('index', False):
+            handler = self.get_indexed_handler(handler_type, **config)
+        elif config.get('durability', 'none') != 'none':
+            config.pop('index', None)
+            handler = self.get_durable_handler(handler_type, **config)
+        else:
+            config.pop('index', None)
+            config.pop('durability', None)
+            handler = self.get_handler(handler_type, **config)
+
+        self.set_handler_log_level(handler, log_level)
+        handler.setFormatter(self.get_formatter(log_format or getattr(handler, 'default_format', None), log_fields))
+
+        if collapse_repeats or sample_rate is not None or rate_limit is not None:
+            from .filters import RateLimitFilter, RepeatFilter, SampleFilter, install_close
+
+            install_close(handler)
+
+        if collapse_repeats:
+            handler.addFilter(RepeatFilter(handler, repeat_timeout))
+
+        if sample_rate is not None:
+            handler.addFilter(SampleFilter(handler, sample_rate, summary_interval))
+
+        if rate_limit is not None:
+            handler.addFilter(RateLimitFilter(handler, rate_limit, summary_interval=summary_interval))
+
+        if LoggerCommon.collect_stats:
+            HandlerStats.install(handler)
+
+        self.created_handlers.add(handler)
+        handler.handler_spec = handler_spec
+
+        return handler
+
+    def get_shared_handler(self, handler_type: str, config: dict) -> logging.Handler:
+        """Return the registered handler instance for the handler configuration, increments its reference count"""
+
+        key = self.get_registry_key(handler_type, config)
+
+        with self.registry_lock:
+            handler = self.handler_registry.get(key)
+
+            if handler is None:
+                handler = self.create_handler(handler_type, config)
+                self.handler_registry[key] = handler
+                self.handler_refs[handler] = [key, 0]
+
+            self.handler_refs[handler][1] += 1
+
+        return handler
+
+    @staticmethod
+    def get_registry_key(handler_type: str, config: dict) -> tuple:
+        """Return a hashable key for the handler type and its normalized configuration"""
+
+        import json
+
+        config = dict(config)
+
+        if 'filename' in config:
+            config['filename'] = os.path.abspath(str(config['filename']))
+
+        return handler_type, json.dumps(config, sort_keys=True, default=repr)
+
+    @classmethod
+    def get_handler_spec(cls, handler_type: str, config: dict) -> tuple:
+        """Return the handler type and normalized configuration, without the logging level"""
+
+        return cls.get_registry_key(handler_type, {k: v for k, v in config.items() if k != 'log_level'})
+
+    @classmethod
+    def release_handler(cls, handler: logging.Handler) -> bool:
+        """
+        Decrements the reference count of a shared handler
+        Returns true if the handler is not used anymore and can be closed
+
+        """
+        with cls.registry_lock:
+            ref = cls.handler_refs.get(handler)
+
+            if ref is None:
+                return True
+
+            ref[1] -= 1
+
+            if ref[1] > 0:
+                return False
+
+            cls.handler_refs.pop(handler)
+            cls.handler_registry.pop(ref[0], None)
+
+        return True
+
+    @classmethod
+    def release_handlers(cls) -> None:
+        """Drop every shared handler reference, the handlers are closed by their next close_handler call"""
+
+        with cls.registry_lock:
+            cls.handler_refs.clear()
+            cls.handler_registry.clear()
+
+    @classmethod
+    def close_handler(cls, handler: logging.Handler) -> None:
+        """Close handler, shared handlers are closed when their last reference is released"""
+
+        if cls.release_handler(handler):
+            handler.close()
 
     @classmethod
     def add_handler(cls, logger: logging.Logger, handlers: Union[List[logging.Handler], logging.Handler],
@@ -86,29 +291,127 @@ class LoggerHandlerUtil(LoggerCommon):
             handlers = [handlers]
 
         for h in handlers:
+            if h in logger.handlers and h in cls.handler_refs:
+                cls.release_handler(h)
+                continue
+
             if reset_handler:
-                for x in [x for x in logger.handlers if type(x) == type(h)]:
+                for x in [x for x in logger.handlers if type(x) == type(h) and x is not h]:
                     cls.remove_handler(logger, x)
 
             logger.addHandler(h)
 
+        cls.invalidate_level_cache()
+
     @classmethod
     def get_handler(cls, handler_type: str, **kwargs) -> logging.Handler:
         """logging.Handler factory method, returns a handler instance"""
 
-        if isinstance(handler_type, str) and handler_type in cls.handler_mapping.keys():
-            return cls.handler_mapping[handler_type](**kwargs)
+        return cls.get_handler_class(handler_type)(**kwargs)
+
+    @classmethod
+    def get_durable_handler(cls, handler_type: str, **kwargs) -> logging.Handler:
+        """Return a handler instance with an fsync policy, for the file handler types"""
+
+        if not isinstance(handler_type, str) or handler_type not in cls.durable_handler_mapping:
+            raise ValueError('invalid type for durability - {}'.format(handler_type))
+
+        return cls.resolve_handler_class(cls.durable_handler_mapping[handler_type])(**kwargs)
+
+    @classmethod
+    def get_indexed_handler(cls, handler_type: str, **kwargs) -> logging.Handler:
+        """Return a handler instance maintaining a sidecar time index, for the rotating file handler types"""
+
+        if not isinstance(handler_type, str) or handler_type not in cls.indexed_handler_mapping:
+            raise ValueError('invalid type for index - {}'.format(handler_type))
+
+        if kwargs.get('durability', 'none') != 'none':
+            return cls.resolve_handler_class(cls.durable_indexed_handler_mapping[handler_type])(**kwargs)
+
+        kwargs.pop('durability', None)
+
+        return cls.resolve_handler_class(cls.indexed_handler_mapping[handler_type])(**kwargs)
+
+    @classmethod
+    def get_handler_class(cls, handler_type: str) -> type:
+        """
+        Return the handler class of a handler type, its module is imported on first use
+        Handler types not found in handler_mapping are looked up in the "pynata.handlers" entry points
+
+        """
+        handler_class = cls.handler_classes.get(handler_type) if isinstance(handler_type, str) else None
+
+        if handler_class is not None:
+            return handler_class
+
+        if isinstance(handler_type, str) and handler_type not in cls.handler_mapping:
+            cls.load_entry_points()
+
+        if not isinstance(handler_type, str) or handler_type not in cls.handler_mapping:
+            raise ValueError('invalid type for handler_type - {}'.format(handler_type))
+
+        handler_class = cls.handler_classes[handler_type] = cls.resolve_handler_class(cls.handler_mapping[handler_type])
 
-        raise ValueError('invalid type for handler_type - {}'.format(handler_type))
+        return handler_class
 
     @staticmethod
-    def remove_handler(logger: logging.Logger, handler: logging.Handler) -> None:
+    def resolve_handler_class(path: Union[str, type]) -> type:
+        """Import a handler class from a "module.Class" or "module:Class" path"""
+
+        if not isinstance(path, str):
+            return path
+
+        module_name, _, attr = path.partition(':') if ':' in path else path.rpartition('.')
+        handler_class = importlib.import_module(module_name)
+
+        for name in attr.split('.'):
+            handler_class = getattr(handler_class, name)
+
+        return handler_class
+
+    @classmethod
+    def register_handler(cls, handler_type: str, handler_class: Union[str, type]) -> None:
+        """Register a handler type, the handler class or its dotted path is resolved on first use"""
+
+        with cls.registry_lock:
+            cls.handler_mapping[handler_type] = handler_class
+            cls.handler_classes.pop(handler_type, None)
+
+    @classmethod
+    def load_entry_points(cls) -> None:
+        """
+        Register the handler types of installed packages, without importing them
+        Packages declare handler types in the "pynata.handlers" entry point group, as name = module:Class
+
+        """
+        with cls.registry_lock:
+            if cls.entry_points_loaded:
+                return
+
+            cls.entry_points_loaded = True
+
+            try:
+                from importlib.metadata import entry_points
+            except ImportError:
+                return
+
+            eps = entry_points()
+            group = eps.select(group=cls.entry_point_group) if hasattr(eps, 'select') \
+                else eps.get(cls.entry_point_group, [])
+
+            for ep in group:
+                cls.handler_mapping.setdefault(ep.name, ep.value)
+
+    @classmethod
+    def remove_handler(cls, logger: logging.Logger, handler: logging.Handler) -> None:
         """Remove and close handler found on Logger instance"""
 
         logger.removeHandler(handler)
-        handler.close()
+        cls.invalidate_level_cache()
+        cls.close_handler(handler)
 
     def set_handler_log_level(self, handler: logging.Handler, log_level: Union[str, int, bool]) -> None:
         """Set handler logging level"""
 
         handler.setLevel(self.get_logging_level(log_level))
+        self.invalidate_level_cache()
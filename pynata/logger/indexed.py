@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.indexed
+~~~~~~~~~~~~~
+Rotating file logging handlers maintaining a sidecar time index, and index query tool
+
+Usage: python -m pynata.logger.indexed <filename> [--start TIME] [--end TIME] [--level LEVEL]
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import sys
+import glob
+import struct
+import logging
+import argparse
+import datetime
+import logging.handlers
+from typing import Iterator, List, Tuple, Union
+
+from .common import LoggerCommon
+from .durable import DurableRotatingFileHandler, DurableTimedRotatingFileHandler
+
+INDEX_MAGIC = b'PYNIDX01'
+INDEX_HEADER = struct.Struct('<8sB')
+INDEX_ENTRY = struct.Struct('<cddBQI')
+
+ENTRY_BLOCK, ENTRY_RECORD = b'B', b'R'
+
+
+def get_index_dir(filename: str) -> str:
+    """Return the directory of the sidecar indexes of a log file and its rotated generations"""
+
+    return os.path.abspath(filename) + '.index'
+
+
+def get_index_filename(filename: str, stat: os.stat_result) -> str:
+    """Return the sidecar index of a log file generation, named by file identity so it survives renames"""
+
+    return os.path.join(get_index_dir(filename), '{}-{}.idx'.format(stat.st_dev, stat.st_ino))
+
+
+class IndexingMixin:
+    def __init__(self, *args, index: Union[bool, dict] = True, **kwargs):
+        """
+        Maintains a sidecar index of the log file and each rotated generation, in the <filename>.index directory
+        A block entry, with the first and last timestamp, highest level, byte offset and length of the records,
+        is written every "records" records or "kb" kilobytes, each record at or above "level" gets its own entry
+
+        :param bool|dict index: true for the defaults, or a dictionary of "records", "kb" and "level"
+            defaults to 1000 records, 64 kb and "warning"
+
+        """
+        index = index if isinstance(index, dict) else {}
+        unknown = set(index) - {'records', 'kb', 'level'}
+
+        if unknown:
+            raise ValueError('invalid index - {}'.format(index))
+
+        self.index_records = int(index.get('records', 1000))
+        self.index_bytes = int(float(index.get('kb', 64)) * 1024)
+        self.index_level = LoggerCommon.get_logging_level(index.get('level', 'warning'))
+
+        self.index_stream = None
+        self.position = None
+        self.block = None
+
+        super().__init__(*args, **kwargs)
+
+    def tell_stream(self) -> int:
+        """Return the byte position of the flushed stream"""
+
+        stream = self.stream
+
+        return stream.buffer.tell() if hasattr(stream, 'buffer') else stream.tell()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Rotate the file if required, write the record and update the index"""
+
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+
+            if self.stream is None:
+                self.stream = self._open()
+                self.position = None
+
+            start = self.position if self.position is not None else self.tell_stream()
+
+            logging.StreamHandler.emit(self, record)
+
+            self.index_record(record, start, self.tell_stream())
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+    def open_index(self, start: int) -> None:
+        """Open the index of the current file, a new file starts a new index"""
+
+        path = get_index_filename(self.baseFilename, os.fstat(self.stream.fileno()))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        new_index = start == 0 or not os.path.exists(path)
+        self.index_stream = open(path, 'wb' if new_index else 'ab')
+
+        if new_index:
+            self.index_stream.write(INDEX_HEADER.pack(INDEX_MAGIC, self.index_level))
+
+    def index_record(self, record: logging.LogRecord, start: int, end: int) -> None:
+        """Add the written record to the current block, write the index entries which are due"""
+
+        if self.index_stream is None:
+            self.open_index(start)
+
+        if self.block is None:
+            self.block = [record.created, record.created, record.levelno, start, 0]
+
+        block = self.block
+        block[1] = record.created
+        block[2] = max(block[2], record.levelno)
+        block[4] += 1
+
+        self.position = end
+        written = False
+
+        if record.levelno >= self.index_level:
+            self.index_stream.write(INDEX_ENTRY.pack(ENTRY_RECORD, record.created, record.created, record.levelno,
+                                                     start, end - start))
+            written = True
+
+        if block[4] >= self.index_records or end - block[3] >= self.index_bytes:
+            self.close_block()
+            written = True
+
+        if written:
+            self.index_stream.flush()
+
+    def close_block(self) -> None:
+        """Write the entry of the current block"""
+
+        if self.block is not None and self.index_stream is not None:
+            first, last, level, offset, _ = self.block
+            self.index_stream.write(INDEX_ENTRY.pack(ENTRY_BLOCK, first, last, level, offset,
+                                                     self.position - offset))
+
+        self.block = None
+
+    def close_index(self) -> None:
+        """Write the current block and close the index of the current file"""
+
+        self.close_block()
+
+        if self.index_stream is not None:
+            self.index_stream.close()
+            self.index_stream = None
+
+        self.position = None
+
+    def remove_stale_indexes(self) -> None:
+        """Remove the indexes of deleted generations"""
+
+        index_dir = get_index_dir(self.baseFilename)
+
+        if not os.path.isdir(index_dir):
+            return
+
+        current = {os.path.basename(get_index_filename(self.baseFilename, os.stat(x)))
+                   for x in get_generations(self.baseFilename)}
+
+        for name in os.listdir(index_dir):
+            if name.endswith('.idx') and name not in current:
+                os.remove(os.path.join(index_dir, name))
+
+    def doRollover(self) -> None:
+        """Close the index of the current file before rotation, remove the indexes of deleted generations"""
+
+        self.close_index()
+        super().doRollover()
+        self.remove_stale_indexes()
+
+    def close(self) -> None:
+        """Write the current block and close the index and the file"""
+
+        with self.lock:
+            self.close_index()
+
+        super().close()
+
+
+class IndexedRotatingFileHandler(IndexingMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class IndexedTimedRotatingFileHandler(IndexingMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class DurableIndexedRotatingFileHandler(IndexingMixin, DurableRotatingFileHandler):
+    pass
+
+
+class DurableIndexedTimedRotatingFileHandler(IndexingMixin, DurableTimedRotatingFileHandler):
+    pass
+
+
+def get_generations(filename: str) -> List[str]:
+    """Return the log file and its rotated generations which exist"""
+
+    base = os.path.abspath(filename)
+    paths = [base] + glob.glob(glob.escape(base) + '.*')
+
+    return [x for x in paths if os.path.isfile(x)]
+
+
+def read_index(path: str) -> Tuple[int, List[tuple]]:
+    """Return the indexed logging level and the entries of a sidecar index, a truncated last entry is ignored"""
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < INDEX_HEADER.size or data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        raise ValueError('invalid index file - {}'.format(path))
+
+    index_level = INDEX_HEADER.unpack_from(data)[1]
+    count = (len(data) - INDEX_HEADER.size) // INDEX_ENTRY.size
+
+    return index_level, [INDEX_ENTRY.unpack_from(data, INDEX_HEADER.size + i * INDEX_ENTRY.size)
+                         for i in range(count)]
+
+
+def query(filename: str, start: float = None, end: float = None, level: Union[str, int] = None,
+          encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Yield the records of a log file and its indexed generations in a time range and at or above a level,
+    oldest generation first, reading only the file regions selected by the sidecar indexes
+
+    Records at or above the indexed level are selected exactly, otherwise whole index blocks overlapping the
+    time range and holding a record at or above the level are yielded, plus the unindexed tail of a file
+
+    :param float start: earliest record creation time, as a Unix timestamp
+    :param float end: latest record creation time, as a Unix timestamp
+    :param str|int level: lowest logging level
+
+    """
+    level = LoggerCommon.get_logging_level(level)
+    start = float('-inf') if start is None else start
+    end = float('inf') if end is None else end
+
+    generations = []
+
+    for path in get_generations(filename):
+        index_path = get_index_filename(filename, os.stat(path))
+
+        if os.path.exists(index_path):
+            index_level, entries = read_index(index_path)
+            generations.append((min([x[1] for x in entries] or [os.path.getmtime(path)]), path, index_level, entries))
+
+    for _, path, index_level, entries in sorted(generations):
+        with open(path, 'rb') as f:
+            if level and level >= index_level:
+                selected = [x for x in entries if x[0] == ENTRY_RECORD and x[3] >= level and start <= x[1] <= end]
+            else:
+                blocks = [x for x in entries if x[0] == ENTRY_BLOCK]
+                selected = [x for x in blocks if x[3] >= level and x[1] <= end and x[2] >= start]
+                covered = max([x[4] + x[5] for x in blocks] or [0])
+                last = max([x[2] for x in entries] or [float('-inf')])
+
+                if os.path.getsize(path) > covered and last <= end:
+                    selected.append((ENTRY_BLOCK, last, last, 0, covered, os.path.getsize(path) - covered))
+
+            for entry in selected:
+                f.seek(entry[4])
+                yield f.read(entry[5]).decode(encoding, errors='replace')
+
+
+def parse_time(value: str) -> float:
+    """Return the Unix timestamp of a number or of an ISO 8601 date and time, local time if no offset is given"""
+
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def main(args: List[str] = None) -> None:
+    """Command line query tool, prints the selected records to stdout"""
+
+    parser = argparse.ArgumentParser(description='Query a pynata indexed log file and its rotated generations')
+    parser.add_argument('filename', help='log file name given to the rotating handler')
+    parser.add_argument('--start', type=parse_time, help='earliest time, Unix timestamp or ISO 8601')
+    parser.add_argument('--end', type=parse_time, help='latest time, Unix timestamp or ISO 8601')
+    parser.add_argument('--level', help='lowest logging level')
+
+    parsed = parser.parse_args(args)
+
+    for text in query(parsed.filename, parsed.start, parsed.end, parsed.level):
+        sys.stdout.write(text)
+
+
+if __name__ == '__main__':
+    main()
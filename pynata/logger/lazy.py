@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.lazy
+~~~~~~~~~~~~~
+Logger wrapper evaluating expensive messages only when a record would be handled
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+from typing import Callable
+
+from .common import LoggerCommon
+
+
+class Lazy:
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func: Callable, *args, **kwargs):
+        """Deferred call, used as a LazyLogger message argument, evaluated only if the record is handled"""
+
+        self.func, self.args, self.kwargs = func, args, kwargs
+
+    def __call__(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+class LazyLogger:
+    def __init__(self, logger: logging.Logger):
+        """
+        logging.Logger wrapper for expensive debug payloads
+        A callable message and Lazy arguments are evaluated only when the Logger level and the level of
+        at least one handler would accept the record
+
+        example: log.debug(lambda: 'response %s' % dump(body)) or log.debug('response %s', Lazy(dump, body))
+
+        """
+        self.logger = logger
+        self.enabled_levels = {}
+        self.generation = None
+
+    def is_enabled(self, level: int) -> bool:
+        """
+        Return true if a record of the level would be handled by at least one handler
+        Handler levels are cached until LoggerCommon.invalidate_level_cache is called by a level or handler change
+        Handlers behind a queue are taken as accepting every record their own level accepts
+
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+
+        if self.generation != LoggerCommon.level_generation:
+            self.enabled_levels, self.generation = {}, LoggerCommon.level_generation
+
+        enabled = self.enabled_levels.get(level)
+
+        if enabled is None:
+            enabled = self.enabled_levels[level] = self.handlers_accept(level)
+
+        return enabled
+
+    def handlers_accept(self, level: int) -> bool:
+        """Return true if a handler of the Logger or of its propagation parents accepts the level"""
+
+        logger, found = self.logger, False
+
+        while logger:
+            for h in logger.handlers:
+                found = True
+
+                if level >= h.level:
+                    return True
+
+            if not logger.propagate:
+                break
+
+            logger = logger.parent
+
+        return not found and logging.lastResort is not None and level >= logging.lastResort.level
+
+    def log_lazy(self, level: int, msg, args: tuple, kwargs: dict) -> None:
+        """Evaluate the message and its Lazy arguments, then log the record with the caller location"""
+
+        if not self.is_enabled(level):
+            return
+
+        if callable(msg):
+            msg = msg()
+
+        if any(isinstance(x, Lazy) for x in args):
+            args = tuple(x() if isinstance(x, Lazy) else x for x in args)
+
+        kwargs['stacklevel'] = kwargs.get('stacklevel', 1) + 2
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def log(self, level: int, msg, *args, **kwargs) -> None:
+        self.log_lazy(level, msg, args, kwargs)
+
+    def debug(self, msg, *args, **kwargs) -> None:
+        self.log_lazy(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg, *args, **kwargs) -> None:
+        self.log_lazy(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg, *args, **kwargs) -> None:
+        self.log_lazy(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg, *args, **kwargs) -> None:
+        self.log_lazy(logging.ERROR, msg, args, kwargs)
+
+    def exception(self, msg, *args, exc_info=True, **kwargs) -> None:
+        self.log_lazy(logging.ERROR, msg, args, dict(kwargs, exc_info=exc_info))
+
+    def critical(self, msg, *args, **kwargs) -> None:
+        self.log_lazy(logging.CRITICAL, msg, args, kwargs)
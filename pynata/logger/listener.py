@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.listener
+~~~~~~~~~~~~~
+Queue based non-blocking logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import queue
+import logging
+import logging.handlers
+from typing import Callable, List, Union
+
+
+class OverflowQueueHandler(logging.handlers.QueueHandler):
+    overflow_policies = ('block', 'drop_newest', 'drop_oldest')
+
+    def __init__(self, queue_obj: queue.Queue, overflow: str = 'block'):
+        """
+        QueueHandler with a selectable policy for a full, bounded queue
+
+        :param str overflow:
+            "block" - wait for free space in the queue
+            "drop_newest" - discard the record being enqueued
+            "drop_oldest" - discard the oldest record waiting in the queue
+
+        """
+        if overflow not in self.overflow_policies:
+            raise ValueError('invalid queue overflow policy - {}'.format(overflow))
+
+        super().__init__(queue_obj)
+
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue a record, applying the overflow policy if the queue is full"""
+
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+
+            except queue.Full:
+                self.dropped += 1
+
+                if self.overflow == 'drop_newest':
+                    return
+
+            try:
+                self.queue.get_nowait()
+
+                if hasattr(self.queue, 'task_done'):
+                    self.queue.task_done()
+
+            except queue.Empty:
+                pass
+
+
+class CloseMarker:
+    def __init__(self, handlers: List[logging.Handler]):
+        """Queued after the records of handlers removed from a listener, the listener closes them when reached"""
+
+        self.handlers = handlers
+
+
+class LoggerQueueListener(logging.handlers.QueueListener):
+    def __init__(self, queue_obj: queue.Queue, handlers: List[logging.Handler],
+                 close_handler: Callable[[logging.Handler], None] = None):
+        """
+        QueueListener which owns its handlers and respects their logging levels
+
+        :param callable close_handler: called to close each handler when the listener stops
+
+        """
+        super().__init__(queue_obj, *handlers, respect_handler_level=True)
+
+        self.close_handler = close_handler or (lambda h: h.close())
+
+    def enqueue_sentinel(self) -> None:
+        """Blocking put, the stop sentinel must never be dropped on a full queue"""
+
+        self.queue.put(self._sentinel)
+
+    def handle(self, record: Union[logging.LogRecord, CloseMarker]) -> None:
+        """Pass the record to the handlers, or close the handlers of a close marker"""
+
+        if isinstance(record, CloseMarker):
+            for h in record.handlers:
+                self.close_handler(h)
+        else:
+            super().handle(record)
+
+    def close_handlers(self, handlers: List[logging.Handler]) -> None:
+        """
+        Close handlers removed from the listener on the listener thread, once the records queued before are handled
+        so a record being handled never reopens a closed handler
+
+        """
+        if self._thread is not None:
+            self.queue.put(CloseMarker(handlers))
+        else:
+            for h in handlers:
+                self.close_handler(h)
+
+    def stop(self) -> None:
+        """Process every record remaining in the queue, stop the thread and close the handlers"""
+
+        if self._thread is not None:
+            super().stop()
+
+        for h in self.handlers:
+            h.flush()
+            self.close_handler(h)
@@ -9,16 +9,46 @@ Utility classes for Python built-in logging
 :license: MPL 2.0, see LICENSE for more details
 """
 
+import os
+import sys
+import time
 import logging
-import logging.handlers
-from typing import Union
+import threading
+from typing import TYPE_CHECKING, Callable, List, Union
 
+from . import context
 from .common import LoggerCommon
 from .handler import LoggerHandlerUtil
+from .lazy import LazyLogger
+from .stats import HandlerStats, get_handler_stats
+
+if TYPE_CHECKING:
+    import asyncio
+    import multiprocessing
+
+    from .aio import AsyncioListener, AsyncioQueueHandler
+    from .listener import OverflowQueueHandler
+
+# queue listeners, asyncio and multiprocessing support are imported on first use, to keep the package import fast
 
 
 class LoggerUtil(LoggerCommon):
     handler = LoggerHandlerUtil()
+    listeners = {}
+    writers = []
+    stats_export = None
+    config_watch = None
+    reconfigure_lock = threading.Lock()
+    shutdown_timeout = 5.0
+    replaced_close_delay = 1.0
+
+    # contextual record fields, see pynata.logger.context
+    bind_context = staticmethod(context.bind_context)
+    unbind_context = staticmethod(context.unbind_context)
+    clear_context = staticmethod(context.clear_context)
+    get_context = staticmethod(context.get_context)
+    bound_context = staticmethod(context.bound_context)
+    set_context_defaults = staticmethod(context.set_context_defaults)
 
     def setup_logger(self, logger_name: str, logger_level: Union[str, int, bool] = None,
                      handler_config: Union[dict, bool] = None, **kwargs) -> logging.Logger:
@@ -31,6 +61,18 @@ class LoggerUtil(LoggerCommon):
 
         :param bool remove_handlers: remove any existing handler on Logger object - defaults to True
         :param bool reset_handler_type: override existing handler type on Logger object - defaults to False
+        :param bool shared_handlers: reuse handler instances with identical configuration - defaults to False
+
+        :param bool async_mode: run handlers behind a QueueListener thread - defaults to False
+        :param bool asyncio: run handlers on a worker thread fed by an asyncio writer task - defaults to False
+            logging from coroutines never blocks the event loop, see flush and aclose
+        :param asyncio.AbstractEventLoop loop: event loop of the writer task - defaults to the running loop
+        :param multiprocessing.Queue writer_queue: send records to the writer process started with start_writer
+
+        :param int queue_size: maximum number of records waiting in the queue in async and asyncio mode,
+            in asyncio mode new records are dropped above it - defaults to 10000
+        :param str queue_overflow: full queue policy in async mode and for the writer queue, "block",
+            "drop_newest" or "drop_oldest" - defaults to "block"
 
         """
         logger = self.get_logger(logger_name)
@@ -41,11 +83,410 @@ class LoggerUtil(LoggerCommon):
         if kwargs.get('remove_handlers', True):
             self.remove_logger_handlers(logger)
 
-        for h in self.handler.setup_handlers(handler_config):
+        handlers = self.handler.setup_handlers(handler_config, kwargs.get('shared_handlers', False))
+
+        if kwargs.get('async_mode', False) and handlers:
+            handlers = [self.setup_listener(logger, handlers, kwargs.get('queue_size', 10000),
+                                            kwargs.get('queue_overflow', 'block'))]
+
+        elif kwargs.get('asyncio', False) and handlers:
+            handlers = [self.setup_asyncio_listener(logger, handlers, kwargs.get('queue_size', 10000),
+                                                    kwargs.get('loop'))]
+
+        if kwargs.get('writer_queue') is not None:
+            from .listener import OverflowQueueHandler
+
+            handlers.append(OverflowQueueHandler(kwargs['writer_queue'], kwargs.get('queue_overflow', 'block')))
+
+        for h in handlers:
+            if self.collect_stats:
+                HandlerStats.install(h)
+
+            self.handler.created_handlers.add(h)
+
+        for h in handlers:
             self.handler.add_handler(logger, h, kwargs.get('reset_handler_type', False))
 
         return logger
 
+    def reconfigure(self, config: dict) -> None:
+        """
+        Apply a logging configuration to running Loggers, changing only what differs from the current state
+
+        Handlers are matched by type and configuration: unchanged handlers are kept open, handlers differing
+        only in "log_level" get the new level, other handlers are created, swapped in with a single list
+        assignment and the replaced handlers are closed afterwards, so no record is lost in between
+        Handlers behind an async mode or asyncio mode listener are swapped on the listener, and the replaced
+        handlers are closed on the listener thread once the records queued before the swap are handled
+        Replaced handlers of a Logger are closed LoggerUtil.replaced_close_delay seconds later, from a daemon
+        thread, so records already being emitted by other threads are written instead of reopening the file,
+        a record taking longer than the delay may still reopen it, a delay of 0 closes them immediately
+        Handlers not created by pynata are kept, Loggers missing from the configuration are not changed
+
+        :param dict config: setup_logger parameters per Logger name, "logger_level" and "handler_config"
+            example: {
+                "app": {"logger_level": "info", "handler_config": {"file": {"filename": "/var/tmp/app.log"}}},
+                "app.db": {"logger_level": "warning"}
+            }
+
+        """
+        with self.reconfigure_lock:
+            for logger_name, logger_config in config.items():
+                logger = self.get_logger(logger_name)
+
+                if logger_config.get('logger_level') is not None:
+                    self.set_logger_level(logger, logger_config['logger_level'])
+
+                if 'handler_config' in logger_config:
+                    self.reconfigure_handlers(logger, logger_config['handler_config'])
+
+    def reconfigure_handlers(self, logger: logging.Logger, handler_config: Union[dict, bool]) -> None:
+        """Replace the handlers of the Logger by the handler configuration, see reconfigure"""
+
+        listeners = self.listeners.get(logger.name, [])
+        owner = listeners[0] if len(listeners) == 1 else logger
+
+        current = list(owner.handlers)
+        replaced = [x for x in current if getattr(x, 'handler_spec', None) is not None]
+        handlers = [x for x in current if x not in replaced]
+
+        for handler_type, config in self.handler.iter_handler_configs(handler_config):
+            handler_spec = self.handler.get_handler_spec(handler_type, config)
+            handler = next((x for x in replaced if x.handler_spec == handler_spec), None)
+
+            if handler is None:
+                handler = self.handler.create_handler(handler_type, config)
+            else:
+                replaced.remove(handler)
+                self.handler.set_handler_log_level(handler, config.get('log_level', 'notset'))
+
+            handlers.append(handler)
+
+        owner.handlers = handlers if owner is logger else type(owner.handlers)(handlers)
+        self.invalidate_level_cache()
+
+        if not replaced:
+            return
+
+        if owner is not logger:
+            owner.close_handlers(replaced)
+
+        elif self.replaced_close_delay > 0:
+            timer = threading.Timer(self.replaced_close_delay, self.close_handlers, (replaced,))
+            timer.daemon = True
+            timer.start()
+
+        else:
+            self.close_handlers(replaced)
+
+    def close_handlers(self, handlers: List[logging.Handler]) -> None:
+        """Close handlers replaced by reconfigure"""
+
+        for h in handlers:
+            self.handler.close_handler(h)
+
+    def watch_config(self, filename: str, interval: float = 1.0) -> None:
+        """
+        Reconfigure from a JSON file whenever it changes, checked every interval seconds from a daemon thread
+        The file is applied when the watch starts, see reconfigure for the file contents
+        Unreadable or invalid files are reported once per change and ignored
+
+        """
+        import json
+
+        self.stop_config_watch()
+
+        stop_event = threading.Event()
+
+        def watch():
+            last = None
+
+            while True:
+                try:
+                    stat = os.stat(filename)
+                    current = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    current = None
+
+                if current != last:
+                    last = current
+
+                    try:
+                        with open(filename) as f:
+                            self.reconfigure(json.load(f))
+                    except Exception:
+                        logging.getLogger(__name__).exception('reconfiguration failed - {}'.format(filename))
+
+                if stop_event.wait(interval):
+                    break
+
+        thread = threading.Thread(target=watch, daemon=True)
+        thread.start()
+
+        LoggerUtil.config_watch = (thread, stop_event)
+
+    def stop_config_watch(self) -> None:
+        """Stop watching the config file"""
+
+        if LoggerUtil.config_watch is not None:
+            thread, stop_event = LoggerUtil.config_watch
+            stop_event.set()
+
+            if thread is not threading.current_thread():
+                thread.join()
+
+            LoggerUtil.config_watch = None
+
+    def setup_listener(self, logger: logging.Logger, handlers: List[logging.Handler], queue_size: int = 10000,
+                       queue_overflow: str = 'block') -> 'OverflowQueueHandler':
+        """
+        Start a QueueListener thread running the handlers, return the QueueHandler to be added to the Logger
+
+        :param int queue_size: maximum number of records in the queue, 0 or less means unbounded
+        :param str queue_overflow: full queue policy, "block", "drop_newest" or "drop_oldest"
+
+        """
+        import queue
+        from .listener import LoggerQueueListener, OverflowQueueHandler
+
+        queue_obj = queue.Queue(maxsize=queue_size)
+        queue_handler = OverflowQueueHandler(queue_obj, queue_overflow)
+
+        listener = LoggerQueueListener(queue_obj, handlers, self.handler.close_handler)
+        listener.start()
+
+        self.listeners.setdefault(logger.name, []).append(listener)
+
+        return queue_handler
+
+    def setup_asyncio_listener(self, logger: logging.Logger, handlers: List[logging.Handler], queue_size: int = 10000,
+                               loop: 'asyncio.AbstractEventLoop' = None) -> 'AsyncioQueueHandler':
+        """
+        Start an asyncio writer task running the handlers, return the QueueHandler to be added to the Logger
+
+        :param int queue_size: maximum number of records in the queue, 0 or less means unbounded
+        :param asyncio.AbstractEventLoop loop: event loop of the writer task - defaults to the running loop
+
+        """
+        import asyncio
+        from .aio import AsyncioListener, AsyncioQueueHandler
+
+        loop = loop or asyncio.get_running_loop()
+        queue_obj = asyncio.Queue(maxsize=queue_size)
+
+        listener = AsyncioListener(queue_obj, handlers, loop, self.handler.close_handler)
+        listener.start()
+
+        self.listeners.setdefault(logger.name, []).append(listener)
+
+        return AsyncioQueueHandler(queue_obj, loop)
+
+    def get_asyncio_listeners(self, logger_name: str = None) -> List['AsyncioListener']:
+        """Return the asyncio writers of the Logger, or of every Logger if no name is provided"""
+
+        from .aio import AsyncioListener
+
+        names = [logger_name] if logger_name is not None else list(self.listeners)
+
+        return [x for name in names for x in self.listeners.get(name, []) if isinstance(x, AsyncioListener)]
+
+    async def flush(self, logger_name: str = None) -> None:
+        """Wait until the records queued in asyncio mode are handled and flush the handlers"""
+
+        for listener in self.get_asyncio_listeners(logger_name):
+            await listener.flush()
+
+    async def aclose(self, logger_name: str = None) -> None:
+        """Remove the asyncio mode handlers, handle the queued records and close the handlers without blocking"""
+
+        for name in [logger_name] if logger_name is not None else list(self.listeners):
+            logger = self.get_logger(name)
+
+            for listener in self.get_asyncio_listeners(name):
+                self.listeners[name].remove(listener)
+
+                for h in [x for x in logger.handlers if getattr(x, 'queue', None) is listener.queue]:
+                    self.handler.remove_handler(logger, h)
+
+                await listener.aclose()
+
+            if not self.listeners.get(name, True):
+                self.listeners.pop(name)
+
+    def get_stats(self) -> dict:
+        """
+        Return runtime metrics of the handlers, per Logger name
+        Handlers running behind a QueueListener thread or asyncio writer are listed with "listener": true
+
+        handler metrics: records emitted and filtered, formatted bytes, handle() latency histogram,
+            queue depth and dropped records for queued and buffering handlers
+
+        """
+        stats = {}
+
+        for name, logger in list(logging.Logger.manager.loggerDict.items()):
+            if not isinstance(logger, logging.Logger):
+                continue
+
+            handlers = [get_handler_stats(h) for h in logger.handlers]
+
+            for listener in self.listeners.get(name, []):
+                for h in listener.handlers:
+                    handlers.append(dict(get_handler_stats(h), listener=True))
+
+            if handlers:
+                stats[name] = handlers
+
+        return stats
+
+    def start_stats_export(self, callback: Callable[[dict], None], interval: float = 60.0) -> None:
+        """Call the callback with the result of get_stats every interval seconds, from a daemon thread"""
+
+        self.stop_stats_export()
+
+        stop_event = threading.Event()
+
+        def export():
+            while not stop_event.wait(interval):
+                try:
+                    callback(self.get_stats())
+                except Exception:
+                    logging.getLogger(__name__).exception('stats export failed')
+
+        thread = threading.Thread(target=export, daemon=True)
+        thread.start()
+
+        LoggerUtil.stats_export = (thread, stop_event)
+
+    def stop_stats_export(self) -> None:
+        """Stop the periodic stats export"""
+
+        if LoggerUtil.stats_export is not None:
+            thread, stop_event = LoggerUtil.stats_export
+            stop_event.set()
+
+            if thread is not threading.current_thread():
+                thread.join()
+
+            LoggerUtil.stats_export = None
+
+    def start_writer(self, handler_config: Union[dict, bool], queue_size: int = 10000,
+                     mp_context: str = None) -> 'multiprocessing.Queue':
+        """
+        Start the single writer owning the logging handlers, return the queue to be passed to worker processes
+
+        Worker processes call setup_logger with the "writer_queue" parameter, records are pickled with their
+        message pre-formatted and handled by a QueueListener thread of the calling, parent process
+
+        :param dict handler_config: logging handlers owned by the writer, see LoggerHandlerUtil.setup_handlers
+        :param int queue_size: maximum number of records in the queue, 0 or less means unbounded
+        :param str mp_context: multiprocessing start method used to create the queue - defaults to the platform default
+
+        """
+        import multiprocessing
+        from .listener import LoggerQueueListener
+
+        queue_obj = multiprocessing.get_context(mp_context).Queue(queue_size)
+
+        listener = LoggerQueueListener(queue_obj, self.handler.setup_handlers(handler_config),
+                                       self.handler.close_handler)
+        listener.start()
+
+        self.writers.append(listener)
+
+        return queue_obj
+
+    def stop_writer(self, queue_obj: 'multiprocessing.Queue' = None) -> None:
+        """
+        Process every record remaining in the queue, stop the writer and close its handlers
+        If no queue is provided, every writer is stopped
+
+        """
+        for listener in [x for x in self.writers if queue_obj is None or x.queue is queue_obj]:
+            self.writers.remove(listener)
+            listener.stop()
+
+    def shutdown(self, timeout: float = None) -> List[logging.Handler]:
+        """
+        Flush and close every handler created by pynata, in parallel, within a single deadline
+        Called at interpreter exit, returns the handlers which missed the deadline
+
+        Handlers are first removed from their Loggers, then queue listeners and writers drain their queues
+        while the other handlers are flushed and closed, each on its own daemon thread
+        Handlers missing the deadline are reported on stderr and left to their threads, they are also
+        excluded from the logging module shutdown so interpreter exit does not wait for them
+
+        :param float timeout: seconds to wait for all handlers - defaults to LoggerUtil.shutdown_timeout
+
+        """
+        deadline = time.monotonic() + (self.shutdown_timeout if timeout is None else timeout)
+
+        self.stop_stats_export()
+        self.stop_config_watch()
+        self.handler.release_handlers()
+
+        loggers = [logging.root] + [x for x in logging.Logger.manager.loggerDict.values()
+                                    if isinstance(x, logging.Logger)]
+        handlers, listeners = [], []
+
+        for logger in loggers:
+            for h in [x for x in logger.handlers if x in self.handler.created_handlers]:
+                logger.removeHandler(h)
+
+                if h not in handlers:
+                    handlers.append(h)
+
+            listeners.extend(self.listeners.pop(logger.name, []))
+
+        listeners.extend(self.writers)
+        self.writers.clear()
+        self.invalidate_level_cache()
+
+        tasks = [(x.handlers, x.stop) for x in listeners] + [([x], self.get_close_task(x)) for x in handlers]
+        threads = []
+
+        for owned, task in tasks:
+            thread = threading.Thread(target=task, name='pynata-shutdown', daemon=True)
+            thread.start()
+            threads.append((owned, thread))
+
+        missed = []
+
+        for owned, thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+            if thread.is_alive():
+                missed.extend(owned)
+
+        for h in missed:
+            sys.stderr.write('pynata: handler missed the shutdown deadline - {!r}\n'.format(h))
+
+            # logging.shutdown would wait for the handler lock held by the blocked thread
+            for ref in [x for x in logging._handlerList if x() is h]:
+                logging._handlerList.remove(ref)
+
+        return missed
+
+    @staticmethod
+    def get_close_task(handler: logging.Handler) -> Callable[[], None]:
+        """Return a function flushing and closing the handler, errors are reported by the handler"""
+
+        def close():
+            try:
+                handler.flush()
+            finally:
+                handler.close()
+
+        return close
+
+    def get_lazy_logger(self, logger: Union[str, logging.Logger]) -> LazyLogger:
+        """Return a LazyLogger wrapper, evaluating callable messages and Lazy arguments only if they are handled"""
+
+        if isinstance(logger, str):
+            logger = self.get_logger(logger)
+
+        return LazyLogger(logger)
+
     @staticmethod
     def get_logger(logger_name: str) -> logging.Logger:
         """Return logging.Logger instance, creates new instance if no instance exists by the given name"""
@@ -59,6 +500,7 @@ class LoggerUtil(LoggerCommon):
             logger = self.get_logger(logger)
 
         logger.setLevel(self.get_logging_level(logger_level))
+        self.invalidate_level_cache()
 
     def remove_logger(self, logger_name: Union[str, logging.Logger]) -> None:
         """
@@ -89,5 +531,13 @@ class LoggerUtil(LoggerCommon):
     def remove_logger_handlers(self, logger: logging.Logger) -> None:
         """Remove and close all handlers found on the logging.Logger instance"""
 
-        for h in logger.handlers:
+        for h in list(logger.handlers):
             self.handler.remove_handler(logger, h)
+
+        self.remove_logger_listeners(logger)
+
+    def remove_logger_listeners(self, logger: logging.Logger) -> None:
+        """Drain the queues, stop the QueueListener threads or asyncio writers and close their handlers"""
+
+        for listener in self.listeners.pop(logger.name, []):
+            listener.stop()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.mmapring
+~~~~~~~~~~~~~
+Memory mapped circular file logging handler and reader
+
+Usage: python -m pynata.logger.mmapring <filename>
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import sys
+import mmap
+import zlib
+import struct
+import logging
+import argparse
+from typing import Iterator, List
+
+FILE_MAGIC = b'PYNRING1'
+FILE_HEADER = struct.Struct('<8sQQQ')
+RECORD_MAGIC = b'\xa5\x5a'
+RECORD_HEADER = struct.Struct('<2sII')
+
+
+class MmapRingHandler(logging.Handler):
+    def __init__(self, filename: str, capacity: int = 16 * 1024 * 1024):
+        """
+        Appends formatted records to a fixed size, memory mapped circular file
+
+        File layout: header (magic, capacity, write offset, generation) followed by the data area
+        Each record is framed as (magic, length, crc32, payload), when a record does not fit at the end
+        of the data area the remaining bytes are zeroed and writing continues from the beginning
+
+        :param str filename: ring file, reopened and continued if it exists with the same capacity
+        :param int capacity: size of the data area in bytes
+
+        """
+        super().__init__()
+
+        self.filename = os.path.abspath(str(filename))
+        self.capacity = capacity
+        self.offset, self.generation = 0, 0
+
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            size = FILE_HEADER.size + capacity
+
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+
+            self.mm = mmap.mmap(fd, size)
+
+        finally:
+            os.close(fd)
+
+        magic, file_capacity, offset, generation = FILE_HEADER.unpack_from(self.mm, 0)
+
+        if magic == FILE_MAGIC and file_capacity == capacity and offset <= capacity:
+            self.offset, self.generation = offset, generation
+        else:
+            FILE_HEADER.pack_into(self.mm, 0, FILE_MAGIC, capacity, 0, 0)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Copy the framed, formatted record into the ring"""
+
+        try:
+            data = self.format(record).encode('utf-8')[:self.capacity - RECORD_HEADER.size]
+            size = RECORD_HEADER.size + len(data)
+            start = FILE_HEADER.size + self.offset
+
+            if self.offset + size > self.capacity:
+                self.mm[start:FILE_HEADER.size + self.capacity] = bytes(self.capacity - self.offset)
+                self.offset, self.generation = 0, self.generation + 1
+                start = FILE_HEADER.size
+
+            RECORD_HEADER.pack_into(self.mm, start, RECORD_MAGIC, len(data), zlib.crc32(data))
+            self.mm[start + RECORD_HEADER.size:start + size] = data
+
+            self.offset += size
+            struct.pack_into('<QQ', self.mm, 16, self.offset, self.generation)
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Write the memory mapped pages to disk"""
+
+        with self.lock:
+            if self.mm is not None:
+                self.mm.flush()
+
+    def close(self) -> None:
+        """Unmap the ring file"""
+
+        with self.lock:
+            if self.mm is not None:
+                self.mm.flush()
+                self.mm.close()
+                self.mm = None
+
+            super().close()
+
+
+def read_records(data: bytes, start: int, end: int) -> Iterator[bytes]:
+    """Yield the valid records between start and end, resynchronizing on partially overwritten records"""
+
+    pos = start
+
+    while pos + RECORD_HEADER.size <= end:
+        magic, length, crc = RECORD_HEADER.unpack_from(data, pos)
+        payload_end = pos + RECORD_HEADER.size + length
+
+        if magic == RECORD_MAGIC and payload_end <= end:
+            payload = data[pos + RECORD_HEADER.size:payload_end]
+
+            if zlib.crc32(payload) == crc:
+                yield payload
+                pos = payload_end
+                continue
+
+        pos = data.find(RECORD_MAGIC, pos + 1, end)
+
+        if pos < 0:
+            return
+
+
+def read_ring(filename: str) -> Iterator[str]:
+    """Yield the records found in a ring file, oldest first"""
+
+    with open(filename, 'rb') as f:
+        data = f.read()
+
+    magic, capacity, offset, generation = FILE_HEADER.unpack_from(data, 0)
+
+    if magic != FILE_MAGIC:
+        raise ValueError('invalid ring file - {}'.format(filename))
+
+    data_start = FILE_HEADER.size
+
+    if generation > 0:
+        for payload in read_records(data, data_start + offset, data_start + capacity):
+            yield payload.decode('utf-8', 'replace')
+
+    for payload in read_records(data, data_start, data_start + offset):
+        yield payload.decode('utf-8', 'replace')
+
+
+def main(args: List[str] = None) -> None:
+    """Command line reader, prints the records of a ring file to stdout"""
+
+    parser = argparse.ArgumentParser(description='Print the records of a pynata mmapring file, oldest first')
+    parser.add_argument('filename', help='ring file written by the mmapring handler')
+
+    for line in read_ring(parser.parse_args(args).filename):
+        sys.stdout.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
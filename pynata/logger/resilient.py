@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.resilient
+~~~~~~~~~~~~~
+Socket logging handlers with reconnect backoff and disk spill
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import time
+import queue
+import struct
+import logging
+import threading
+import logging.handlers
+from typing import Callable, Iterator, List
+
+from .common import LoggerCommon
+
+
+class SegmentSpool:
+    segment_suffix = '.seg'
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024, segment_bytes: int = 4 * 1024 * 1024):
+        """
+        Bounded on-disk log of length prefixed frames, split into numbered segment files
+        Segments left over by a previous process are replayed first
+
+        :param str directory: segment file directory, created when the first segment is started
+        :param int max_bytes: maximum size of all segments, the oldest segments are deleted above it
+        :param int segment_bytes: size at which a new segment file is started
+
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.dropped = 0
+
+        self.segments = {}
+
+        for name in sorted(os.listdir(directory) if os.path.isdir(directory) else []):
+            if name.endswith(self.segment_suffix):
+                path = os.path.join(directory, name)
+
+                with open(path, 'rb') as f:
+                    self.segments[path] = [os.path.getsize(path), len(list(self.iter_frames(f.read())))]
+
+        self.seq = max([int(os.path.basename(x)[:-len(self.segment_suffix)]) for x in self.segments] or [0])
+        self.writer, self.writer_path = None, None
+
+    @property
+    def pending(self) -> bool:
+        """Return true if the spool holds unsent frames"""
+
+        return bool(self.segments)
+
+    @staticmethod
+    def iter_frames(data: bytes) -> Iterator[bytes]:
+        """Yield the length prefixed frames of a segment, a truncated last frame is ignored"""
+
+        pos = 0
+
+        while pos + 4 <= len(data):
+            end = pos + 4 + struct.unpack_from('>L', data, pos)[0]
+
+            if end > len(data):
+                return
+
+            yield data[pos:end]
+            pos = end
+
+    def append(self, frame: bytes) -> None:
+        """Append a frame to the newest segment, deletes the oldest segments above the size limit"""
+
+        if self.writer is None or self.segments[self.writer_path][0] >= self.segment_bytes:
+            self.close_writer()
+            os.makedirs(self.directory, exist_ok=True)
+            self.seq += 1
+            self.writer_path = os.path.join(self.directory, '{:012d}{}'.format(self.seq, self.segment_suffix))
+            self.writer = open(self.writer_path, 'ab')
+            self.segments[self.writer_path] = [0, 0]
+
+        self.writer.write(frame)
+        self.segments[self.writer_path][0] += len(frame)
+        self.segments[self.writer_path][1] += 1
+
+        while sum(x[0] for x in self.segments.values()) > self.max_bytes and len(self.segments) > 1:
+            path = next(iter(self.segments))
+            self.dropped += self.segments.pop(path)[1]
+            os.remove(path)
+
+    def close_writer(self) -> None:
+        """Close the newest segment file"""
+
+        if self.writer is not None:
+            self.writer.close()
+            self.writer, self.writer_path = None, None
+
+    def replay(self, send: Callable[[bytes], None]) -> None:
+        """
+        Send the spooled frames in order, deleting each segment once all of its frames are sent
+        On a send error the unsent frames are kept and the error is raised
+
+        """
+        self.close_writer()
+
+        for path in list(self.segments):
+            with open(path, 'rb') as f:
+                frames = list(self.iter_frames(f.read()))
+
+            for i, frame in enumerate(frames):
+                try:
+                    send(frame)
+
+                except OSError:
+                    self.rewrite(path, frames[i:])
+                    raise
+
+            self.segments.pop(path)
+            os.remove(path)
+
+    def rewrite(self, path: str, frames: List[bytes]) -> None:
+        """Replace the contents of a segment with the unsent frames"""
+
+        with open(path + '.tmp', 'wb') as f:
+            f.write(b''.join(frames))
+
+        os.replace(path + '.tmp', path)
+        self.segments[path] = [sum(len(x) for x in frames), len(frames)]
+
+
+class ResilientSenderMixin:
+    def __init__(self, host: str, port: int, spool_dir: str = None, max_spool_bytes: int = 64 * 1024 * 1024,
+                 segment_bytes: int = 4 * 1024 * 1024, max_queue: int = 10000, retry_start: float = 0.5,
+                 retry_max: float = 30.0, retry_factor: float = 2.0):
+        """
+        Records are pickled on the calling thread and sent by a background thread over a persistent socket
+        While the collector is unreachable, records are spilled to an on-disk segment spool and replayed in order
+        once the connection is back, reconnects are attempted with exponential backoff
+
+        Records are delivered at least once, frames of a segment sent before a connection error may be resent
+
+        :param str spool_dir: spool directory, must not be shared by processes - defaults to a directory per host,
+            port and process id in the home directory, set it to replay the records spilled before a restart
+        :param int max_spool_bytes: maximum spool size, the oldest records are deleted above it
+        :param int segment_bytes: size of a spool segment file
+        :param int max_queue: maximum number of records waiting for the sender thread, new records are dropped above
+        :param float retry_start: seconds to wait before the first reconnect
+        :param float retry_max: maximum seconds between reconnects
+        :param float retry_factor: multiplier of the wait time after each failed reconnect
+
+        """
+        super().__init__(host, port)
+
+        if spool_dir is None:
+            spool_dir = os.path.join(LoggerCommon.get_default_logging_dir(), '.pynata-spool',
+                                     '{}-{}-{}'.format(host, port, os.getpid()))
+
+        self.spool = SegmentSpool(spool_dir, max_spool_bytes, segment_bytes)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+        self.retryStart, self.retryMax, self.retryFactor = retry_start, retry_max, retry_factor
+        self.retryTime, self.retryPeriod = None, retry_start
+
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Pickle the record and pass it to the sender thread"""
+
+        try:
+            self.queue.put_nowait(self.makePickle(record))
+
+        except queue.Full:
+            self.dropped += 1
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+    def connect(self) -> bool:
+        """Return true if a socket is available, opens a new one once the backoff period has passed"""
+
+        if self.sock is not None:
+            return True
+
+        now = time.monotonic()
+
+        if self.retryTime is not None and now < self.retryTime:
+            return False
+
+        try:
+            self.sock = self.makeSocket()
+            self.retryTime, self.retryPeriod = None, self.retryStart
+            return True
+
+        except OSError:
+            self.retryTime = now + self.retryPeriod
+            self.retryPeriod = min(self.retryPeriod * self.retryFactor, self.retryMax)
+            return False
+
+    def disconnect(self) -> None:
+        """Close the socket, the next reconnect follows the backoff schedule"""
+
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+        self.retryTime = time.monotonic() + self.retryPeriod
+        self.retryPeriod = min(self.retryPeriod * self.retryFactor, self.retryMax)
+
+    def deliver(self, frame: bytes = None) -> None:
+        """Replay the spool if required, then send the frame, spilling it to the spool if it can not be sent"""
+
+        if self.spool.pending and self.connect():
+            try:
+                self.spool.replay(self.send_frame)
+
+            except OSError:
+                self.disconnect()
+
+        if frame is None:
+            return
+
+        if self.spool.pending or not self.connect():
+            self.spool.append(frame)
+            return
+
+        try:
+            self.send_frame(frame)
+
+        except OSError:
+            self.disconnect()
+            self.spool.append(frame)
+
+    def _monitor(self) -> None:
+        """Deliver queued records until the handler is closed, runs on a separate daemon thread"""
+
+        while True:
+            try:
+                frame = self.queue.get(timeout=self.retryStart)
+
+            except queue.Empty:
+                frame = False
+
+            if frame is None:
+                break
+
+            self.deliver(frame or None)
+
+        self.spool.close_writer()
+
+    def close(self) -> None:
+        """Deliver or spill the queued records, stop the sender thread and close the socket"""
+
+        with self.lock:
+            if self._thread.is_alive():
+                self.queue.put(None)
+                self._thread.join()
+
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+
+            logging.Handler.close(self)
+
+
+class ResilientSocketHandler(ResilientSenderMixin, logging.handlers.SocketHandler):
+    def send_frame(self, frame: bytes) -> None:
+        """Send a length prefixed pickled record over the stream socket"""
+
+        self.sock.sendall(frame)
+
+
+class ResilientDatagramHandler(ResilientSenderMixin, logging.handlers.DatagramHandler):
+    def send_frame(self, frame: bytes) -> None:
+        """Send a length prefixed pickled record as a single datagram"""
+
+        self.sock.sendto(frame, self.address)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.ringbuffer
+~~~~~~~~~~~~~
+In-process ring buffer logging handler
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+from collections import deque
+from typing import Union
+
+from .common import LoggerCommon
+
+
+class RingBufferHandler(logging.Handler):
+    partitions = {'logger': 'name', 'thread': 'thread', None: None}
+
+    def __init__(self, target: logging.Handler, capacity: int = 1000, max_age: float = None,
+                 trigger_level: Union[str, int] = 'error', partition: str = None, max_partitions: int = 1024):
+        """
+        Keeps the most recent records in bounded buffers and writes nothing until a trigger record arrives
+        On a record at or above the trigger level, the buffered records and the trigger record are
+        passed to the target handler
+
+        :param logging.Handler target: handler receiving the buffered records, closed with this handler
+        :param int capacity: maximum number of records kept per buffer
+        :param float max_age: maximum age of the kept records in seconds - defaults to no limit
+        :param str|int trigger_level: logging level which flushes the buffer - defaults to "error"
+        :param str partition: keep separate buffers per "logger" or "thread" - defaults to a single buffer
+        :param int max_partitions: maximum number of buffers, the oldest buffer is discarded above the limit
+
+        """
+        if partition not in self.partitions:
+            raise ValueError('invalid partition - {}'.format(partition))
+
+        super().__init__()
+
+        self.target = target
+        self.capacity = capacity
+        self.max_age = max_age
+        self.trigger_level = LoggerCommon.get_logging_level(trigger_level)
+        self.partition_attr = self.partitions[partition]
+        self.max_partitions = max_partitions
+        self.buffers = {}
+
+    def get_buffer(self, record: logging.LogRecord) -> deque:
+        """Return the buffer for the partition of the record"""
+
+        key = getattr(record, self.partition_attr) if self.partition_attr else None
+        buffer = self.buffers.get(key)
+
+        if buffer is None:
+            if len(self.buffers) >= self.max_partitions:
+                self.buffers.pop(next(iter(self.buffers)))
+
+            buffer = self.buffers[key] = deque(maxlen=self.capacity)
+
+        return buffer
+
+    def expire(self, buffer: deque, now: float) -> None:
+        """Discard the records older than max_age from the buffer"""
+
+        if self.max_age is not None:
+            while buffer and now - buffer[0].created > self.max_age:
+                buffer.popleft()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffer the record, pass the buffered records to the target handler on a trigger record"""
+
+        buffer = self.get_buffer(record)
+        self.expire(buffer, record.created)
+
+        if record.levelno < self.trigger_level:
+            buffer.append(record)
+            return
+
+        while buffer:
+            self.target.handle(buffer.popleft())
+
+        self.target.handle(record)
+
+    def flush(self) -> None:
+        """Records are only passed to the target on a trigger record, flushes the target handler"""
+
+        with self.lock:
+            if self.target is not None:
+                self.target.flush()
+
+    def close(self) -> None:
+        """Discard the buffered records and close the target handler"""
+
+        with self.lock:
+            self.buffers.clear()
+
+            if self.target is not None:
+                self.target.close()
+                self.target = None
+
+            super().close()
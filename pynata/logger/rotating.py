@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.rotating
+~~~~~~~~~~~~~
+Rotating file logging handlers compressing rotated files in the background
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import gzip
+import shutil
+import itertools
+import logging.handlers
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+def compress_file(source: str, dest: str, compression: str = 'gzip') -> None:
+    """Compress the source file into the destination file, then remove the source file"""
+
+    tmp = dest + '.tmp'
+
+    with open(source, 'rb') as f_in:
+        if compression == 'zstd':
+            with open(tmp, 'wb') as f_out, zstandard.ZstdCompressor().stream_writer(f_out) as writer:
+                shutil.copyfileobj(f_in, writer)
+
+        elif compression == 'lz4':
+            with lz4.frame.open(tmp, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+
+        else:
+            with gzip.open(tmp, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+
+    os.replace(tmp, dest)
+    os.remove(source)
+
+
+class CompressingRotatorMixin:
+    compression_extensions = {'gzip': '.gz', 'zstd': '.zst', 'lz4': '.lz4'}
+
+    def __init__(self, *args, compression: str = 'gzip', max_compressions: int = 1, **kwargs):
+        """
+        Rotated files are renamed inline and compressed by background worker threads
+
+        :param str compression: "gzip", "zstd" or "lz4", zstd and lz4 require the zstandard and lz4 packages
+        :param int max_compressions: maximum number of files compressed at the same time
+
+        """
+        if compression not in self.compression_extensions:
+            raise ValueError('invalid compression - {}'.format(compression))
+
+        elif (compression == 'zstd' and zstandard is None) or (compression == 'lz4' and lz4 is None):
+            raise ValueError('compression not available, package is not installed - {}'.format(compression))
+
+        self.compression = compression
+        self.executor = ThreadPoolExecutor(max_workers=max_compressions, thread_name_prefix='pynata-compress')
+
+        super().__init__(*args, **kwargs)
+
+    def rotation_filename(self, default_name: str) -> str:
+        """Return the name of the compressed, rotated file"""
+
+        return default_name + self.compression_extensions[self.compression]
+
+    def rotate(self, source: str, dest: str) -> None:
+        """Rename the file to be rotated, then submit it for compression"""
+
+        if not os.path.exists(source):
+            return
+
+        pending = dest + '.pending'
+        os.rename(source, pending)
+        self.executor.submit(compress_file, pending, dest, self.compression)
+
+    def close(self) -> None:
+        """Close the file, then wait for the submitted compressions to finish"""
+
+        super().close()
+        self.executor.shutdown(wait=True)
+
+
+class GzRotatingFileHandler(CompressingRotatorMixin, logging.handlers.RotatingFileHandler):
+    def __init__(self, *args, **kwargs):
+        """
+        Rotating file handler which never waits for a compression on rollover
+        The file is renamed to a unique pending name, a worker compresses it, then shifts the numbered
+        backups and installs it as the first backup, in rollover order
+
+        """
+        self.rollover_seq = itertools.count(1)
+        self.last_rollover = None
+
+        super().__init__(*args, **kwargs)
+
+    def doRollover(self) -> None:
+        """Rename the file to a unique pending name and submit it for compression and backup shifting"""
+
+        if self.backupCount <= 0:
+            super().doRollover()
+            return
+
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename):
+            pending = '{}.{}-{}.pending'.format(self.baseFilename, os.getpid(), next(self.rollover_seq))
+            os.rename(self.baseFilename, pending)
+
+            self.last_rollover = self.executor.submit(self.compress_backup, pending, self.last_rollover)
+
+        if not self.delay:
+            self.stream = self._open()
+
+    def compress_backup(self, pending: str, previous: Future = None) -> None:
+        """Compress a pending file, then shift the numbered backups once the previous rollover is installed"""
+
+        compressed = pending + self.compression_extensions[self.compression]
+        compress_file(pending, compressed, self.compression)
+
+        if previous is not None:
+            wait([previous])
+
+        for i in range(self.backupCount - 1, 0, -1):
+            source = self.rotation_filename('{}.{}'.format(self.baseFilename, i))
+
+            if os.path.exists(source):
+                os.replace(source, self.rotation_filename('{}.{}'.format(self.baseFilename, i + 1)))
+
+        os.replace(compressed, self.rotation_filename(self.baseFilename + '.1'))
+
+
+class GzTimedRotatingFileHandler(CompressingRotatorMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
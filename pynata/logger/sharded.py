@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.sharded
+~~~~~~~~~~~~~
+Per-thread sharded file logging handler and shard merge tool
+
+Usage: python -m pynata.logger.sharded <filename> [--output FILE] [--keep-prefix]
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import re
+import sys
+import glob
+import heapq
+import logging
+import argparse
+import itertools
+import threading
+from typing import BinaryIO, Iterator, List, Tuple, Union
+
+from .common import LoggerCommon
+
+shard_pattern = re.compile(r'\.\d+\.\d{4,}$')
+
+
+class ShardedFileHandler(logging.Handler):
+    def __init__(self, filename: str, mode: str = 'a', encoding: str = 'utf-8', buffer_size: int = 65536,
+                 flush_interval: float = 1.0, flush_level: Union[str, int] = 'error'):
+        """
+        File handler without a shared lock, each thread writes to its own buffered shard file
+        named <filename>.<pid>.<shard>, shards of finished threads are reused by new threads
+
+        Each record is prefixed with its creation timestamp and a sequence number, increasing in emit order
+        within the process, continuation lines of multi-line records are prefixed with a tab
+        Use merge_shards or the command line tool to rebuild a single, time ordered log
+
+        :param int buffer_size: size of the write buffer of each shard
+        :param float flush_interval: seconds between flushes of every shard, 0 disables the timer
+        :param str|int flush_level: records at or above this logging level flush the shard
+
+        """
+        super().__init__()
+
+        self.baseFilename = os.path.abspath(filename)
+        self.mode = mode.replace('b', '') + 'b'
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.flush_level = LoggerCommon.get_logging_level(flush_level)
+
+        self.sequence = itertools.count()
+        self.shards = []
+        self.local = threading.local()
+
+        self._flush_event = threading.Event()
+        self._flush_thread = None
+
+        if flush_interval > 0:
+            self._flush_thread = threading.Thread(target=self._flush_monitor, args=(flush_interval,), daemon=True)
+            self._flush_thread.start()
+
+    def _flush_monitor(self, flush_interval: float) -> None:
+        """Flush the shards periodically, runs on a separate daemon thread"""
+
+        while not self._flush_event.wait(flush_interval):
+            self.flush()
+
+    def get_shard(self) -> BinaryIO:
+        """Return the shard file of the calling thread, reusing the shard of a finished thread if available"""
+
+        shard = getattr(self.local, 'shard', None)
+
+        if shard is not None:
+            return shard
+
+        with self.lock:
+            owner = threading.current_thread()
+            entry = next((x for x in self.shards if not x[0].is_alive()), None)
+
+            if entry is None:
+                path = '{}.{}.{:04d}'.format(self.baseFilename, os.getpid(), len(self.shards))
+                entry = [owner, open(path, self.mode, buffering=self.buffer_size)]
+                self.shards.append(entry)
+
+            entry[0] = owner
+            self.local.shard = entry[1]
+
+        return entry[1]
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """Filter and emit the record without acquiring the handler lock"""
+
+        rv = self.filter(record)
+
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+
+        if rv:
+            self.emit(record)
+
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write the prefixed record to the shard of the calling thread"""
+
+        try:
+            msg = self.format(record)
+
+            if '\n' in msg:
+                msg = msg.replace('\n', '\n\t')
+
+            shard = getattr(self.local, 'shard', None) or self.get_shard()
+            shard.write(('%.6f %d %s\n' % (record.created, next(self.sequence), msg)).encode(self.encoding))
+
+            if record.levelno >= self.flush_level:
+                shard.flush()
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Flush every shard, the shard files are safe to flush from any thread"""
+
+        for _, shard in list(self.shards):
+            if not shard.closed:
+                shard.flush()
+
+    def close(self) -> None:
+        """Stop the flush timer, flush and close the shard files"""
+
+        self._flush_event.set()
+
+        if self._flush_thread is not None and self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+
+        with self.lock:
+            for _, shard in self.shards:
+                shard.close()
+
+            self.shards = []
+            self.local = threading.local()
+
+        super().close()
+
+
+def get_shards(filename: str) -> List[str]:
+    """Return the shard files of a sharded log file"""
+
+    base = os.path.abspath(filename)
+
+    return sorted(x for x in glob.glob(glob.escape(base) + '.*.*') if shard_pattern.search(x[len(base):]))
+
+
+def read_shard(path: str, encoding: str = 'utf-8') -> Iterator[Tuple[float, int, str]]:
+    """Yield the timestamp, sequence number and prefixed text of each record of a shard file"""
+
+    with open(path, encoding=encoding, newline='\n') as f:
+        record = None
+
+        for line in f:
+            if line.startswith('\t') and record is not None:
+                record[2].append(line)
+                continue
+
+            if record is not None:
+                yield record[0], record[1], ''.join(record[2])
+
+            created, seq, _ = line.split(' ', 2)
+            record = (float(created), int(seq), [line])
+
+        if record is not None:
+            yield record[0], record[1], ''.join(record[2])
+
+
+def merge_shards(filename: str, keep_prefix: bool = False, encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Yield the records of every shard of a sharded log file in timestamp and sequence order
+    The shards are merged as streams, only one record per shard is held in memory
+
+    :param bool keep_prefix: keep the timestamp and sequence prefix and the continuation line tabs
+
+    """
+    streams = [read_shard(x, encoding) for x in get_shards(filename)]
+
+    for _, _, text in heapq.merge(*streams, key=lambda x: (x[0], x[1])):
+        if keep_prefix:
+            yield text
+        else:
+            yield text.split(' ', 2)[2].replace('\n\t', '\n')
+
+
+def main(args: List[str] = None) -> None:
+    """Command line merge tool, writes the merged records to stdout or to a file"""
+
+    parser = argparse.ArgumentParser(description='Merge the shards of a pynata sharded log file')
+    parser.add_argument('filename', help='log file name given to the shardedfile handler')
+    parser.add_argument('--output', help='write the merged log to a file, defaults to stdout')
+    parser.add_argument('--keep-prefix', action='store_true', help='keep the timestamp and sequence prefix')
+
+    parsed = parser.parse_args(args)
+    output = open(parsed.output, 'w', encoding='utf-8') if parsed.output else sys.stdout
+
+    try:
+        for text in merge_shards(parsed.filename, parsed.keep_prefix):
+            output.write(text)
+
+    finally:
+        if parsed.output:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.shipper
+~~~~~~~~~~~~~
+Batching HTTP log shipper
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import ssl
+import gzip
+import time
+import logging
+import threading
+import http.client
+from collections import deque
+from typing import List
+
+from .formatter import JsonFormatter
+
+
+class BatchHTTPHandler(logging.Handler):
+    default_format = 'json'
+
+    def __init__(self, host: str, url: str, secure: bool = False, headers: dict = None, batch_size: int = 500,
+                 flush_interval: float = 1.0, compress: bool = True, max_buffer: int = 10000, max_retries: int = 3,
+                 backoff: float = 0.5, timeout: float = 5.0, context: ssl.SSLContext = None,
+                 close_timeout: float = 5.0):
+        """
+        Sends newline delimited batches of formatted records with HTTP POST requests from a background thread
+        The connection is kept alive between requests and reopened on errors
+
+        :param str host: "host" or "host:port" of the collector
+        :param str url: request path
+        :param bool secure: use HTTPS
+        :param dict headers: additional request headers
+        :param int batch_size: maximum number of records per request, a full batch is sent at once
+        :param float flush_interval: maximum number of seconds a record waits in the buffer
+        :param bool compress: gzip the request body
+        :param int max_buffer: maximum number of buffered records, new records are dropped and counted above it
+        :param int max_retries: number of retries of a failed request, the batch is dropped afterwards
+        :param float backoff: seconds to wait before the first retry, doubled on each retry
+        :param float timeout: connection timeout in seconds
+        :param float close_timeout: seconds close spends sending the remaining records, one attempt per batch
+            without retries, the records left afterwards are dropped and counted
+
+        """
+        super().__init__()
+        self.setFormatter(JsonFormatter())
+
+        self.host, self.url, self.secure = host, url, secure
+        self.headers = dict(headers or {})
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.context = context
+        self.close_timeout = close_timeout
+
+        self.buffer = deque()
+        self.dropped = 0
+        self.sent = 0
+        self.connection = None
+
+        self._closed = False
+        self._close_deadline = None
+        self._close_event = threading.Event()
+        self._flush_event = threading.Event()
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Format the record into the buffer, wakes up the sender thread if a batch is full"""
+
+        try:
+            if len(self.buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+
+            self.buffer.append(self.format(record))
+
+            if len(self.buffer) >= self.batch_size:
+                self._flush_event.set()
+
+        except RecursionError:
+            raise
+
+        except Exception:
+            self.handleError(record)
+
+    def _monitor(self) -> None:
+        """Send batches until the handler is closed, runs on a separate daemon thread"""
+
+        while True:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+
+            while self.buffer:
+                if self._closed and time.monotonic() >= self._close_deadline:
+                    self.drop_buffer()
+                    break
+
+                self.send_batch(self.take_batch())
+
+            if self._closed:
+                return
+
+    def take_batch(self) -> List[str]:
+        """Remove and return up to batch_size records from the buffer"""
+
+        batch = []
+
+        while self.buffer and len(batch) < self.batch_size:
+            batch.append(self.buffer.popleft())
+
+        return batch
+
+    def drop_buffer(self) -> None:
+        """Drop and count the buffered records"""
+
+        batch = self.take_batch()
+
+        while batch:
+            self.dropped += len(batch)
+            batch = self.take_batch()
+
+    def get_connection(self) -> http.client.HTTPConnection:
+        """Return the persistent connection, opens a new connection if required"""
+
+        if self.connection is None:
+            if self.secure:
+                self.connection = http.client.HTTPSConnection(self.host, timeout=self.timeout, context=self.context)
+            else:
+                self.connection = http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+        return self.connection
+
+    def close_connection(self) -> None:
+        """Close the persistent connection"""
+
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def send_batch(self, batch: List[str]) -> bool:
+        """
+        Send a batch of formatted records, retrying with exponential backoff, return true on success
+        Once the handler is closed a single attempt is made, a running backoff wait is cut short by close
+
+        """
+
+        body = ('\n'.join(batch) + '\n').encode('utf-8')
+        headers = {'Content-Type': 'application/x-ndjson'}
+
+        if self.compress:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+
+        headers.update(self.headers)
+
+        for attempt in range(1 if self._closed else self.max_retries + 1):
+            if attempt and self._close_event.wait(self.backoff * 2 ** (attempt - 1)):
+                break
+
+            try:
+                conn = self.get_connection()
+                conn.request('POST', self.url, body, headers)
+
+                response = conn.getresponse()
+                response.read()
+
+                if response.will_close:
+                    self.close_connection()
+
+                if response.status < 300:
+                    self.sent += len(batch)
+                    return True
+
+                elif response.status != 429 and response.status < 500:
+                    break
+
+            except (OSError, http.client.HTTPException):
+                self.close_connection()
+
+        self.dropped += len(batch)
+
+        return False
+
+    def flush(self) -> None:
+        """Wake up the sender thread to send the buffered records"""
+
+        self._flush_event.set()
+
+    def close(self) -> None:
+        """
+        Send the remaining buffered records within the close timeout, stop the sender thread and close the connection
+        A request started before the deadline may block close for up to the connection timeout
+
+        """
+        self._close_deadline = time.monotonic() + self.close_timeout
+        self._closed = True
+        self._close_event.set()
+        self._flush_event.set()
+
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+        self.close_connection()
+
+        super().close()
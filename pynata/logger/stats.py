@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+pynata.logger.stats
+~~~~~~~~~~~~~
+Runtime metrics for logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import time
+import logging
+from collections import deque
+
+
+class HandlerStats:
+    histogram_buckets = 18
+
+    def __init__(self):
+        """
+        Counters of a single handler, updated without locking, values are approximate under concurrency
+
+        emitted: records passing the handler filters, every record of handlers not reporting the filter result
+        filtered: records dropped by the handler filters
+        bytes: characters produced by the handler formatter, an estimate of the bytes written
+        histogram: handle() latency counts, bucket i holds latencies below 2 ** i microseconds,
+            the last bucket holds every longer latency
+
+        """
+        self.emitted = 0
+        self.filtered = 0
+        self.bytes = 0
+        self.histogram = [0] * self.histogram_buckets
+
+    @classmethod
+    def install(cls, handler: logging.Handler) -> 'HandlerStats':
+        """Instrument the handle and format methods of a handler instance, return its stats"""
+
+        stats = getattr(handler, 'handler_stats', None)
+
+        if stats is not None:
+            return stats
+
+        stats = handler.handler_stats = cls()
+        handle, format_record = handler.handle, handler.format
+        perf_counter_ns, last_bucket = time.perf_counter_ns, cls.histogram_buckets - 1
+
+        def handle_record(record):
+            start = perf_counter_ns()
+            rv = handle(record)
+            elapsed = (perf_counter_ns() - start) >> 10
+
+            if rv or rv is None:
+                stats.emitted += 1
+            else:
+                stats.filtered += 1
+
+            stats.histogram[min(elapsed.bit_length(), last_bucket)] += 1
+
+            return rv
+
+        def format_counted(record):
+            msg = format_record(record)
+            stats.bytes += len(msg) + 1
+
+            return msg
+
+        handler.handle, handler.format = handle_record, format_counted
+
+        return stats
+
+    def as_dict(self) -> dict:
+        """Return the counters as a dictionary"""
+
+        return {'emitted': self.emitted, 'filtered': self.filtered, 'bytes': self.bytes,
+                'latency_histogram_us': {'<{}'.format(2 ** i) if i < self.histogram_buckets - 1 else
+                                         '>={}'.format(2 ** (i - 1)): x for i, x in enumerate(self.histogram)}}
+
+
+def get_handler_stats(handler: logging.Handler) -> dict:
+    """Return the counters of a handler, with queue depth and dropped records for queued handlers"""
+
+    stats = getattr(handler, 'handler_stats', None)
+    result = {'type': type(handler).__name__}
+    result.update(stats.as_dict() if stats is not None else {})
+
+    queue_obj = getattr(handler, 'queue', None)
+    buffer = getattr(handler, 'buffer', None)
+
+    if queue_obj is not None and hasattr(queue_obj, 'qsize'):
+        try:
+            result['queue_depth'] = queue_obj.qsize()
+        except NotImplementedError:
+            pass
+
+    elif isinstance(buffer, (deque, list)):
+        result['queue_depth'] = len(buffer)
+
+    if isinstance(getattr(handler, 'dropped', None), int):
+        result['dropped'] = handler.dropped
+
+    return result
@@ -26,7 +26,7 @@ setup(
     long_description_content_type='text/markdown',
     project_urls=project_urls,
     packages=['pynata', 'pynata.logger'],
-    python_requires='>=3.5.2',
+    python_requires='>=3.8',
     keywords='pynata utility logging',
     classifiers=[
         'Intended Audience :: Developers',
@@ -34,9 +34,10 @@ setup(
         'Operating System :: OS Independent',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
 )
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.benchmarks.bench_logger
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Benchmarks for logging handler types, formatters, logger setup and package import
+
+Usage: python -m tests.benchmarks.bench_logger [--records N] [--threads N] [--loggers N] [--repeats N]
+           [--output FILE] [--baseline FILE] [--save-baseline] [--tolerance RATIO]
+
+Results are written as a flat JSON object, metrics ending with "_per_sec" are higher-is-better,
+every other metric is lower-is-better. The "calibration." metrics time the stock logging module in the
+same process: the baseline stores every other metric as a ratio to its calibration metric, so it holds
+on any host. With a baseline, a ratio worse than the baseline by more than the tolerance is reported
+and the run exits with status 1
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List
+
+from pynata.logger.logger import LoggerUtil
+from pynata.logger.formatter import FastFormatter, JsonFormatter
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# handler types which need a remote service or a specific platform are not benchmarked:
+# 'socket', 'http', 'smtp', 'nteventlog', 'batchhttp', 'resilientsocket', 'resilientdatagram'
+
+
+def handler_configs(tmp_dir: str, udp_port: int) -> Dict[str, dict]:
+    """Return a handler configuration for each handler type which can run locally"""
+
+    def filename(name):
+        return os.path.join(tmp_dir, name)
+
+    return {
+        'null': {},
+        'stream': {'stream': open(os.devnull, 'w')},
+        'file': {'filename': filename('file')},
+        'watchedfile': {'filename': filename('watchedfile')},
+        'rotatingfile': {'filename': filename('rotatingfile'), 'maxBytes': 8 * 1024 * 1024, 'backupCount': 2},
+        'timedrotatingfile': {'filename': filename('timedrotatingfile')},
+        'bufferedfile': {'filename': filename('bufferedfile')},
+        'bufferedrotatingfile': {'filename': filename('bufferedrotatingfile'), 'maxBytes': 8 * 1024 * 1024,
+                                 'backupCount': 2},
+        'bufferedtimedrotatingfile': {'filename': filename('bufferedtimedrotatingfile')},
+        'gzrotatingfile': {'filename': filename('gzrotatingfile'), 'maxBytes': 1024 * 1024, 'backupCount': 2},
+        'gztimedrotatingfile': {'filename': filename('gztimedrotatingfile')},
+        'mmapring': {'filename': filename('mmapring'), 'capacity': 4 * 1024 * 1024},
+        'binaryfile': {'filename': filename('binaryfile')},
+        'shardedfile': {'filename': filename('shardedfile')},
+        'datagram': {'host': '127.0.0.1', 'port': udp_port},
+        'syslog': {'address': ('127.0.0.1', udp_port)},
+        'memory': {'capacity': 1000, 'target': {'null': {}}},
+        'ringbuffer': {'capacity': 1000, 'target': {'null': {}}},
+        'queue': {'queue': queue.SimpleQueue()},
+    }
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    """Return the value at the given ratio of the sorted values"""
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def bench_single_thread(logger: logging.Logger, records: int) -> Dict[str, float]:
+    """Return throughput and per-record latency percentiles of logging from a single thread"""
+
+    latencies = []
+    perf_counter = time.perf_counter
+    start = perf_counter()
+
+    for i in range(records):
+        t = perf_counter()
+        logger.info('benchmark record %d with %s', i, 'argument')
+        latencies.append(perf_counter() - t)
+
+    elapsed = perf_counter() - start
+
+    return {
+        'records_per_sec': records / elapsed,
+        'p50_us': percentile(latencies, 0.5) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def bench_multi_thread(logger: logging.Logger, records: int, threads: int) -> Dict[str, float]:
+    """Return throughput and per-record latency percentiles of logging from several threads at once"""
+
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(results):
+        perf_counter = time.perf_counter
+        barrier.wait()
+
+        for i in range(records // threads):
+            t = perf_counter()
+            logger.info('benchmark record %d with %s', i, 'argument')
+            results.append(perf_counter() - t)
+
+    workers = [threading.Thread(target=worker, args=(x,)) for x in latencies]
+
+    for w in workers:
+        w.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+
+    for w in workers:
+        w.join()
+
+    elapsed = time.perf_counter() - start
+    merged = [x for results in latencies for x in results]
+
+    return {
+        'records_per_sec': len(merged) / elapsed,
+        'p50_us': percentile(merged, 0.5) * 1e6,
+        'p99_us': percentile(merged, 0.99) * 1e6,
+    }
+
+
+def bench_loggers(loggers: Dict[str, logging.Logger], records: int, threads: int,
+                  repeats: int) -> Dict[str, float]:
+    """
+    Return the best single and multi-threaded metrics of several runs of each logger, prefixed with its key
+    The loggers are run alternately, so a change in the speed of the host affects each of them alike
+
+    """
+    results = {}
+
+    for _ in range(repeats):
+        for prefix, logger in loggers.items():
+            for mode, metrics in (('single', bench_single_thread(logger, records)),
+                                  ('multi', bench_multi_thread(logger, records, threads))):
+                for metric, value in metrics.items():
+                    key, best = '{}.{}.{}'.format(prefix, mode, metric), max if metric.endswith('_per_sec') else min
+                    results[key] = best(results[key], value) if key in results else value
+
+    return results
+
+
+def calibration_logger(tmp_dir: str) -> logging.Logger:
+    """Return a Logger with a stock logging.FileHandler, configured without pynata"""
+
+    handler = logging.FileHandler(os.path.join(tmp_dir, 'calibration'))
+    handler.setFormatter(logging.Formatter(LoggerUtil.log_format, LoggerUtil.log_date_format))
+
+    logger = logging.getLogger('pynata.bench.calibration')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+
+    return logger
+
+
+def bench_handlers(log_util: LoggerUtil, records: int, threads: int, repeats: int) -> Dict[str, float]:
+    """Benchmark each locally runnable handler type, alternately with the calibration logger"""
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+        udp.bind(('127.0.0.1', 0))
+        calibration = calibration_logger(tmp_dir)
+
+        try:
+            for handler_type, config in handler_configs(tmp_dir, udp.getsockname()[1]).items():
+                name = 'pynata.bench.{}'.format(handler_type)
+                logger = log_util.setup_logger(name, logger_level='info', handler_config={handler_type: config})
+                logger.propagate = False
+
+                results.update(bench_loggers({'calibration.handler.{}'.format(handler_type): calibration,
+                                              'handler.{}'.format(handler_type): logger}, records, threads, repeats))
+
+                log_util.remove_logger(name)
+
+        finally:
+            for handler in list(calibration.handlers):
+                calibration.removeHandler(handler)
+                handler.close()
+
+            logging.Logger.manager.loggerDict.pop(calibration.name, None)
+
+    return results
+
+
+def bench_formatters(records: int, repeats: int) -> Dict[str, float]:
+    """Return the best formatting cost per record of each formatter, the formatters are run alternately"""
+
+    results = {}
+    fmt, datefmt = LoggerUtil.log_format, LoggerUtil.log_date_format
+    record = logging.LogRecord('pynata.bench', logging.INFO, __file__, 0, 'benchmark record %d with %s',
+                               (1, 'argument'), None)
+
+    for metric, formatter in (('calibration.formatter.ns_per_record', logging.Formatter(fmt, datefmt)),
+                              ('formatter.fast.ns_per_record', FastFormatter(fmt, datefmt)),
+                              ('formatter.json.ns_per_record', JsonFormatter(datefmt=datefmt))) * repeats:
+        start = time.perf_counter()
+
+        for _ in range(records):
+            formatter.format(record)
+
+        elapsed = (time.perf_counter() - start) / records * 1e9
+        results[metric] = min(results[metric], elapsed) if metric in results else elapsed
+
+    return results
+
+
+def bench_setup(log_util: LoggerUtil, loggers: int, repeats: int = 1) -> Dict[str, float]:
+    """
+    Return the best cost of configuring and removing many loggers, alternately with the stock logging module
+    Only the benchmark loggers are removed
+
+    """
+    names = ['pynata.bench.setup.{}'.format(i) for i in range(loggers)]
+    results = {}
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+
+        for name in names:
+            log_util.setup_logger(name, logger_level='info', handler_config={'null': {}})
+
+        setup_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+
+        for name in names:
+            log_util.remove_logger(name)
+
+        remove_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+
+        for name in names:
+            logger = logging.getLogger(name)
+            logger.setLevel(logging.INFO)
+            logger.addHandler(logging.NullHandler())
+
+        for name in names:
+            logger = logging.Logger.manager.loggerDict.pop(name)
+            logger.handlers[0].close()
+
+        calibration_elapsed = time.perf_counter() - start
+
+        for metric, elapsed in (('setup.setup_logger.us_per_logger', setup_elapsed),
+                                ('setup.remove_logger.us_per_logger', remove_elapsed),
+                                ('calibration.setup.us_per_logger', calibration_elapsed)):
+            value = elapsed / loggers * 1e6
+            results[metric] = min(results[metric], value) if metric in results else value
+
+    return results
+
+
+def import_time(module: str, runs: int) -> float:
+    """Return the best cumulative import time of a module in a fresh interpreter, from -X importtime"""
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    timings = []
+
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)], cwd=root,
+                                stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+
+        for line in output.splitlines():
+            parts = line.split('|')
+
+            if len(parts) == 3 and parts[2].strip() == module:
+                timings.append(float(parts[1]))
+
+    return min(timings)
+
+
+def bench_import(runs: int = 5) -> Dict[str, float]:
+    """Return the import time of the pynata package and of the stock logging module"""
+
+    return {'import.pynata.us': import_time('pynata', runs),
+            'calibration.import.us': import_time('logging', runs)}
+
+
+def run(records: int = 20000, threads: int = 4, loggers: int = 2000, repeats: int = 3) -> Dict[str, float]:
+    """Run every benchmark and return the flat results"""
+
+    log_util = LoggerUtil()
+    results = {}
+
+    results.update(bench_handlers(log_util, records, threads, repeats))
+    results.update(bench_formatters(records, repeats))
+    results.update(bench_setup(log_util, loggers, repeats))
+    results.update(bench_import())
+
+    return results
+
+
+def get_calibration_metric(metric: str) -> str:
+    """Return the name of the calibration metric a metric is normalized against"""
+
+    parts = metric.split('.')
+
+    if parts[0] == 'handler':
+        return 'calibration.{}'.format(metric)
+
+    return {'formatter': 'calibration.formatter.ns_per_record', 'setup': 'calibration.setup.us_per_logger',
+            'import': 'calibration.import.us'}[parts[0]]
+
+
+def normalize(results: Dict[str, float]) -> Dict[str, float]:
+    """Return every metric, except the calibration metrics, as a ratio to its calibration metric"""
+
+    normalized = {}
+
+    for metric, value in results.items():
+        if not metric.startswith('calibration.'):
+            reference = results.get(get_calibration_metric(metric))
+
+            if reference:
+                normalized[metric] = value / reference
+
+    return normalized
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Return a description of each metric worse than the baseline by more than the tolerance ratio
+    Latency percentiles of the multi-threaded runs, which mostly measure GIL scheduling, get twice the tolerance
+
+    """
+    regressions = []
+
+    for metric, expected in sorted(baseline.items()):
+        actual = results.get(metric)
+
+        if actual is None or expected <= 0:
+            continue
+
+        if metric.endswith('_per_sec'):
+            regressed = actual < expected * (1 - tolerance)
+        elif '.multi.' in metric:
+            regressed = actual > expected * (1 + 2 * tolerance)
+        else:
+            regressed = actual > expected * (1 + tolerance)
+
+        if regressed:
+            regressions.append('{}: {:.2f} (baseline {:.2f})'.format(metric, actual, expected))
+
+    return regressions
+
+
+def main(args: List[str] = None) -> int:
+    """Command line entry point, returns the exit status"""
+
+    parser = argparse.ArgumentParser(description='pynata logging benchmarks')
+    parser.add_argument('--records', type=int, default=20000, help='records per handler benchmark')
+    parser.add_argument('--threads', type=int, default=4, help='threads of the multi-threaded benchmarks')
+    parser.add_argument('--loggers', type=int, default=2000, help='loggers of the setup benchmark')
+    parser.add_argument('--repeats', type=int, default=3, help='runs of each handler benchmark, the best is kept')
+    parser.add_argument('--output', help='write the results to a JSON file, defaults to stdout')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline JSON file of normalized metrics')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the normalized results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed ratio of regression')
+
+    parsed = parser.parse_args(args)
+    results = run(parsed.records, parsed.threads, parsed.loggers, parsed.repeats)
+    normalized = normalize(results)
+    output = json.dumps(results, indent=2, sort_keys=True)
+
+    if parsed.output:
+        with open(parsed.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+    if parsed.save_baseline:
+        with open(parsed.baseline, 'w') as f:
+            f.write(json.dumps(normalized, indent=2, sort_keys=True) + '\n')
+
+        return 0
+
+    if not os.path.exists(parsed.baseline):
+        return 0
+
+    with open(parsed.baseline) as f:
+        regressions = compare(normalized, json.load(f), parsed.tolerance)
+
+    for line in regressions:
+        sys.stderr.write('regression - {}\n'.format(line))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
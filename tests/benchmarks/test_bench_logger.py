@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.benchmarks.test_bench_logger
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for the logging benchmark runner
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import json
+import logging
+
+from tests.benchmarks import bench_logger
+
+
+class TestCompare:
+    def test_compare(self):
+        baseline = {'a.records_per_sec': 100, 'b.p99_us': 10, 'c.p50_us': 10}
+        results = {'a.records_per_sec': 40, 'b.p99_us': 16, 'c.p50_us': 14}
+
+        assert bench_logger.compare(results, baseline, 0.5) == ['a.records_per_sec: 40.00 (baseline 100.00)',
+                                                                 'b.p99_us: 16.00 (baseline 10.00)']
+
+    def test_compare_multi_thread_latency(self):
+        baseline = {'handler.a.multi.p50_us': 10, 'handler.a.multi.records_per_sec': 100}
+        results = {'handler.a.multi.p50_us': 19, 'handler.a.multi.records_per_sec': 40}
+
+        assert bench_logger.compare(results, baseline, 0.5) == [
+            'handler.a.multi.records_per_sec: 40.00 (baseline 100.00)'
+        ]
+
+
+class TestNormalize:
+    def test_normalize(self):
+        results = {'calibration.handler.null.single.records_per_sec': 100, 'handler.null.single.records_per_sec': 150,
+                   'calibration.formatter.ns_per_record': 1000, 'formatter.fast.ns_per_record': 500,
+                   'calibration.setup.us_per_logger': 10, 'setup.setup_logger.us_per_logger': 40,
+                   'handler.null.multi.p99_us': 20}
+
+        assert bench_logger.normalize(results) == {'handler.null.single.records_per_sec': 1.5,
+                                                   'formatter.fast.ns_per_record': 0.5,
+                                                   'setup.setup_logger.us_per_logger': 4.0}
+
+
+class TestRun:
+    def test_run(self, tmpdir):
+        output, baseline = tmpdir.join('output.json'), tmpdir.join('baseline.json')
+
+        assert bench_logger.main(['--records', '100', '--loggers', '10', '--repeats', '1', '--output', str(output),
+                                  '--baseline', str(baseline), '--save-baseline']) == 0
+
+        results = json.loads(output.read())
+
+        assert json.loads(baseline.read()) == bench_logger.normalize(results)
+        assert 'handler.file.multi.records_per_sec' in results and 'setup.setup_logger.us_per_logger' in results
+        assert set(json.load(open(bench_logger.BASELINE_FILE))) == set(bench_logger.normalize(results))
+
+    def test_run_keeps_loggers(self, tmpdir):
+        logger = logging.getLogger('pynata.test.bench')
+
+        bench_logger.bench_setup(bench_logger.LoggerUtil(), 10)
+
+        assert logging.Logger.manager.loggerDict['pynata.test.bench'] is logger
+        assert not any(x.startswith('pynata.bench.setup.') for x in logging.Logger.manager.loggerDict)
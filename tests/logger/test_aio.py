@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_aio
+~~~~~~~~~~~~~~~~~~~~~
+Unittests for asyncio native logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from pynata.logger.logger import LoggerUtil
+from pynata.logger.aio import AsyncioListener, AsyncioQueueHandler
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records, self.threads = [], set()
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+        self.threads.add(threading.get_ident())
+
+
+@pytest.fixture(scope='class')
+def log_util():
+    return LoggerUtil()
+
+
+@pytest.fixture(scope='function')
+def reset_logger(log_util):
+    log_util.remove_logger(__name__)
+
+
+class TestAsyncioListener:
+    def test_listener(self):
+        target = ListHandler()
+
+        async def main():
+            queue_obj = asyncio.Queue()
+            listener = AsyncioListener(queue_obj, [target], asyncio.get_running_loop())
+            listener.start()
+
+            handler = AsyncioQueueHandler(queue_obj, asyncio.get_running_loop())
+
+            for i in range(10):
+                handler.handle(logging.LogRecord(__name__, logging.INFO, __file__, 0, str(i), None, None))
+
+            await listener.aclose()
+
+        asyncio.run(main())
+
+        assert target.records == [str(i) for i in range(10)]
+        assert threading.get_ident() not in target.threads
+
+    def test_close_handlers(self):
+        target, closed = ListHandler(), []
+
+        async def main():
+            listener = AsyncioListener(asyncio.Queue(), [], asyncio.get_running_loop(),
+                                       lambda h: closed.append((h, threading.get_ident())))
+            listener.start()
+            listener.close_handlers([target])
+
+            await listener.aclose()
+
+        asyncio.run(main())
+
+        assert [x[0] for x in closed] == [target]
+        assert closed[0][1] != threading.get_ident()
+
+    def test_queue_full(self):
+        async def main():
+            handler = AsyncioQueueHandler(asyncio.Queue(maxsize=1), asyncio.get_running_loop())
+
+            for i in range(3):
+                handler.handle(logging.LogRecord(__name__, logging.INFO, __file__, 0, str(i), None, None))
+
+            return handler.dropped
+
+        assert asyncio.run(main()) == 2
+
+
+@pytest.mark.usefixtures('reset_logger')
+class TestSetupLoggerAsyncio:
+    def test_setup_logger_asyncio(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+
+        async def main():
+            logger = log_util.setup_logger(__name__, logger_level='info', asyncio=True,
+                                           handler_config={'file': {'filename': str(f), 'format': '%(message)s'}})
+
+            assert isinstance(logger.handlers[0], AsyncioQueueHandler)
+
+            for i in range(10):
+                logger.info('record %d', i)
+
+            await log_util.flush(__name__)
+
+            assert len(f.readlines()) == 10
+
+            await log_util.aclose(__name__)
+
+            return logger
+
+        logger = asyncio.run(main())
+
+        assert logger.handlers == [] and __name__ not in log_util.listeners
+
+    def test_remove_logger_asyncio(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        loop = asyncio.new_event_loop()
+
+        logger = log_util.setup_logger(__name__, asyncio=True, loop=loop,
+                                       handler_config={'file': {'filename': str(f), 'format': '%(message)s'}})
+        logger.warning('record')
+
+        loop.run_until_complete(asyncio.sleep(0))
+        log_util.remove_logger(__name__)
+        loop.close()
+
+        assert f.read() == 'record\n'
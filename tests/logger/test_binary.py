@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_binary
+~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for compact binary log file handler and decoder
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import sys
+import json
+import logging
+import decimal
+
+from pynata.logger.common import LoggerCommon
+from pynata.logger.binary import BinaryFileHandler, main, read_records, render_records
+
+
+def make_record(msg, args=None, level=logging.INFO, name=__name__, exc_info=None):
+    return logging.LogRecord(name, level, __file__, 10, msg, args, exc_info)
+
+
+class TestBinaryFileHandler:
+    def test_round_trip(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BinaryFileHandler(str(f))
+        records = [
+            make_record('record %d %s', (1, 'a')), make_record('record %d %s', (2, object())),
+            make_record('mapping %(key)s', ({'key': 'value'},), logging.WARNING, 'other'), make_record(ValueError('x'))
+        ]
+
+        for record in records:
+            handler.emit(record)
+
+        handler.close()
+
+        decoded = list(read_records(str(f)))
+        fmt = logging.Formatter('%(asctime)s %(name)s %(levelname)s %(filename)s:%(lineno)d %(message)s')
+
+        assert [x.getMessage() for x in decoded][2:] == ['mapping value', 'x']
+        assert decoded[1].getMessage().startswith('record 2 <object object at')
+        assert [fmt.format(x) for x in decoded][:1] == [fmt.format(records[0])]
+
+    def test_exception(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BinaryFileHandler(str(f))
+
+        try:
+            raise ValueError('error')
+        except ValueError:
+            handler.emit(make_record('failed', exc_info=sys.exc_info()))
+
+        handler.close()
+
+        lines = list(render_records(str(f), '%(levelname)s %(message)s'))
+
+        assert lines[0].startswith('INFO failed\nTraceback') and lines[0].endswith('ValueError: error')
+
+    def test_reopen_interned(self, tmpdir, capsys):
+        f = tmpdir.join('temp_file')
+
+        for msg in ('a', 'b'):
+            handler = BinaryFileHandler(str(f))
+            handler.emit(make_record(msg))
+            handler.emit(make_record('c'))
+            handler.close()
+
+        main([str(f), '--format', '%(message)s'])
+
+        assert capsys.readouterr().out == 'a\nc\nb\nc\n'
+
+    def test_unrenderable_args(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BinaryFileHandler(str(f))
+        handler.emit(make_record('count %d', (decimal.Decimal(5),)))
+        handler.emit(make_record('count %d', (6,)))
+        handler.close()
+
+        assert list(render_records(str(f), '%(message)s')) == ["count %d ('5',)", 'count 6']
+
+    def test_json_format(self, tmpdir, monkeypatch):
+        f = tmpdir.join('temp_file')
+        handler = BinaryFileHandler(str(f))
+        handler.emit(make_record('record %d', (1,)))
+        handler.close()
+
+        monkeypatch.setattr(LoggerCommon, 'log_format', 'json')
+        monkeypatch.setattr(LoggerCommon, 'shared_formatter', None)
+
+        assert json.loads(next(render_records(str(f))))['message'] == 'record 1'
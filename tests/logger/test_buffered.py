@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_buffered
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for write coalescing file logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+
+from pynata.logger.buffered import BufferedFileHandler, BufferedRotatingFileHandler
+
+
+def make_record(msg, level=logging.INFO):
+    return logging.LogRecord(__name__, level, __file__, 0, msg, None, None)
+
+
+class TestBufferedFileHandler:
+    def test_buffer_size(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BufferedFileHandler(str(f), buffer_size=10, flush_interval=0)
+
+        handler.emit(make_record('abc'))
+        assert f.read() == ''
+
+        handler.emit(make_record('defghij'))
+        assert f.read() == 'abc\ndefghij\n'
+
+        handler.close()
+
+    def test_flush_level(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BufferedFileHandler(str(f), flush_interval=0)
+
+        handler.emit(make_record('abc'))
+        assert f.read() == ''
+
+        handler.emit(make_record('def', logging.ERROR))
+        assert f.read() == 'abc\ndef\n'
+
+        handler.close()
+
+    def test_close(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BufferedFileHandler(str(f))
+
+        handler.emit(make_record('abc'))
+        handler.close()
+
+        assert f.read() == 'abc\n'
+
+
+class TestBufferedRotatingFileHandler:
+    def test_rollover(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = BufferedRotatingFileHandler(str(f), maxBytes=20, backupCount=2, flush_interval=0)
+
+        for msg in ('aaaaaaaa', 'bbbbbbbb', 'cccccccc'):
+            handler.emit(make_record(msg))
+
+        handler.close()
+
+        assert tmpdir.join('temp_file.1').read() == 'aaaaaaaa\nbbbbbbbb\n'
+        assert f.read() == 'cccccccc\n'
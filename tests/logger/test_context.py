@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_context
+~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for contextual log record fields
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import io
+import json
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from pynata.logger import context
+from pynata.logger.logger import LoggerUtil
+from pynata.logger.formatter import JsonFormatter
+
+
+@pytest.fixture(scope='function')
+def reset_context():
+    factory = logging.getLogRecordFactory()
+
+    yield
+
+    context.clear_context()
+    logging.setLogRecordFactory(factory)
+
+
+def make_record(msg='message'):
+    return logging.getLogRecordFactory()(__name__, logging.INFO, __file__, 0, msg, None, None)
+
+
+@pytest.mark.usefixtures('reset_context')
+class TestContext:
+    def test_bind_unbind(self):
+        token = context.bind_context(request_id='a', tenant='x')
+        inner = context.bind_context(request_id='b')
+
+        assert make_record().request_id == 'b' and make_record().tenant == 'x'
+
+        context.unbind_context(inner)
+
+        assert context.get_context() == {'request_id': 'a', 'tenant': 'x'}
+
+        context.unbind_context(token)
+
+        assert not hasattr(make_record(), 'request_id')
+
+    def test_reserved_field(self):
+        with pytest.raises(ValueError):
+            context.bind_context(levelname='x')
+
+    def test_factory_installed_once(self):
+        context.bind_context(a=1)
+        factory = logging.getLogRecordFactory()
+        context.bind_context(b=2)
+
+        assert logging.getLogRecordFactory() is factory
+        assert isinstance(factory, context.ContextRecordFactory)
+
+    def test_threads(self):
+        results = {}
+
+        def worker(i):
+            with context.bound_context(request_id=i):
+                barrier.wait()
+                results[i] = make_record().request_id
+
+        barrier = threading.Barrier(4)
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        assert results == {i: i for i in range(4)}
+
+    def test_asyncio_tasks(self):
+        async def handle(i):
+            context.bind_context(request_id=i)
+            await asyncio.sleep(0)
+            return make_record().request_id
+
+        async def main():
+            return await asyncio.gather(*[handle(i) for i in range(4)])
+
+        assert asyncio.run(main()) == [0, 1, 2, 3]
+
+    def test_log_format_defaults(self):
+        stream = io.StringIO()
+        logger = LoggerUtil().setup_logger(__name__, logger_level='info', handler_config={
+            'stream': {'stream': stream, 'format': '%(request_id)s %(message)s'}})
+
+        LoggerUtil.set_context_defaults(request_id='-')
+        logger.info('first')
+
+        with LoggerUtil.bound_context(request_id='abc'):
+            logger.info('second')
+
+        LoggerUtil().remove_logger(__name__)
+
+        assert stream.getvalue().splitlines() == ['- first', 'abc second']
+
+    def test_json_output(self):
+        with context.bound_context(request_id='abc', trace=object()):
+            data = json.loads(JsonFormatter(['message', 'request_id']).format(make_record()))
+
+        assert data['request_id'] == 'abc' and data['message'] == 'message'
+        assert data['trace'].startswith('<object')
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_durable
+~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for file logging handlers with fsync policy
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import time
+import logging
+import threading
+
+import pytest
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.durable import DurableFileHandler, DurableHandlerMixin, DurableRotatingFileHandler
+
+
+def make_record(msg, level=logging.INFO):
+    return logging.LogRecord(__name__, level, __file__, 0, msg, None, None)
+
+
+@pytest.fixture(scope='function')
+def fsync_calls(monkeypatch):
+    calls, fsync = [], os.fsync
+
+    def counted_fsync(fd):
+        calls.append(fd)
+        time.sleep(0.01)
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', counted_fsync)
+
+    return calls
+
+
+class TestParseDurability:
+    @pytest.mark.parametrize('durability, expected', [
+        ('none', (0, 0.0, None)), ('always', (1, 0.0, None)), (100, (100, 0.0, None)),
+        ('100 records', (100, 0.0, None)), ('200ms', (0, 0.2, None)), ('2s', (0, 2.0, None)),
+        ('error', (0, 0.0, logging.ERROR)), ({'records': 10, 'interval_ms': 500, 'level': 'warning'},
+                                            (10, 0.5, logging.WARNING))
+    ])
+    def test_parse(self, durability, expected):
+        assert DurableHandlerMixin.parse_durability(durability) == expected
+
+    @pytest.mark.parametrize('durability', ['sometimes', 0, {'seconds': 1}, None])
+    def test_parse_invalid(self, durability):
+        with pytest.raises(ValueError):
+            DurableHandlerMixin.parse_durability(durability)
+
+
+class TestDurableFileHandler:
+    def test_create_handler(self, tmpdir):
+        util = LoggerHandlerUtil()
+        f = str(tmpdir.join('temp_file'))
+
+        assert type(util.create_handler('file', {'filename': f, 'durability': 'none'})) is logging.FileHandler
+        assert isinstance(util.create_handler('file', {'filename': f, 'durability': 'always'}), DurableFileHandler)
+
+        with pytest.raises(ValueError):
+            util.create_handler('stream', {'durability': 'always'})
+
+    def test_records(self, tmpdir, fsync_calls):
+        handler = DurableFileHandler(str(tmpdir.join('temp_file')), durability='5 records')
+
+        for i in range(12):
+            handler.handle(make_record(str(i)))
+
+        assert len(fsync_calls) == 2
+
+        handler.close()
+
+        assert len(fsync_calls) == 3
+
+    def test_level(self, tmpdir, fsync_calls):
+        handler = DurableFileHandler(str(tmpdir.join('temp_file')), durability='error')
+
+        handler.handle(make_record('info'))
+        handler.handle(make_record('error', logging.ERROR))
+
+        assert len(fsync_calls) == 1
+
+        handler.close()
+
+        assert len(fsync_calls) == 1
+
+    def test_interval(self, tmpdir, fsync_calls):
+        handler = DurableFileHandler(str(tmpdir.join('temp_file')), durability='10ms')
+        handler.handle(make_record('record'))
+
+        assert len(fsync_calls) == 0
+
+        while handler.synced_seq < 1:
+            time.sleep(0.01)
+
+        assert len(fsync_calls) == 1
+
+        handler.close()
+
+    def test_group_commit(self, tmpdir, fsync_calls):
+        f = tmpdir.join('temp_file')
+        handler = DurableFileHandler(str(f), durability='always')
+
+        def worker():
+            for i in range(10):
+                handler.handle(make_record('record'))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        handler.close()
+
+        assert handler.synced_seq == 80
+        assert len(fsync_calls) < 80
+        assert len(f.readlines()) == 80
+
+    def test_rollover(self, tmpdir, fsync_calls):
+        handler = DurableRotatingFileHandler(str(tmpdir.join('temp_file')), maxBytes=20, backupCount=2,
+                                             durability='error')
+
+        handler.handle(make_record('first record'))
+        handler.handle(make_record('second record'))
+
+        assert len(fsync_calls) == 1
+
+        handler.close()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_filters
+~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for logging filters
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import time
+import logging
+
+import pytest
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.filters import RateLimitFilter, RepeatFilter, SampleFilter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(msg, args=None):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 0, msg, args, None)
+
+
+class TestSampleFilter:
+    def test_sample_rate(self):
+        handler = ListHandler()
+        handler.addFilter(SampleFilter(handler, 0.1))
+
+        for i in range(10000):
+            handler.handle(make_record(str(i)))
+
+        assert 500 < len(handler.records) < 1500
+
+    def test_sample_rate_invalid(self):
+        with pytest.raises(ValueError):
+            SampleFilter(ListHandler(), 2)
+
+
+class TestRateLimitFilter:
+    @pytest.mark.parametrize('rate_limit,expected', [
+        (100, (100.0, None)), ('100/s', (100.0, None)), ('60/m', (1.0, None)),
+        ('100/s burst 500', (100.0, 500)), ('100/s with burst 500', (100.0, 500))
+    ])
+    def test_parse_rate_limit(self, rate_limit, expected):
+        assert RateLimitFilter.parse_rate_limit(rate_limit) == expected
+
+    @pytest.mark.parametrize('rate_limit', ['x', '100/d', 0, -1, True])
+    def test_parse_rate_limit_invalid(self, rate_limit):
+        with pytest.raises(ValueError):
+            RateLimitFilter.parse_rate_limit(rate_limit)
+
+    def test_rate_limit_summary(self):
+        handler = ListHandler()
+        rate_filter = RateLimitFilter(handler, '1/h burst 5')
+        handler.addFilter(rate_filter)
+
+        for i in range(20):
+            handler.handle(make_record(str(i)))
+
+        assert [x.msg for x in handler.records] == ['0', '1', '2', '3', '4']
+
+        rate_filter.flush()
+
+        summary = handler.records[-1]
+
+        assert summary.levelno == logging.WARNING and summary.suppressed == 15
+        assert summary.getMessage().startswith('15 records suppressed by RateLimitFilter')
+
+    def test_rate_limit_summary_timer(self):
+        handler = ListHandler()
+        handler.addFilter(RateLimitFilter(handler, '1/s burst 1', summary_interval=0.2))
+
+        for i in range(100):
+            handler.handle(make_record(str(i)))
+
+        time.sleep(0.5)
+
+        assert [x.getMessage()[:40] for x in handler.records] == ['0', '99 records suppressed by RateLimitFilter']
+
+    def test_rate_limit_summary_close(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = LoggerHandlerUtil().create_handler('file', {'filename': str(f), 'format': '%(message)s',
+                                                              'rate_limit': '1/s burst 1'})
+
+        for i in range(100):
+            handler.handle(make_record(str(i)))
+
+        handler.close()
+
+        assert f.read().splitlines()[0] == '0'
+        assert f.read().splitlines()[1].startswith('99 records suppressed by RateLimitFilter')
+        assert handler.filters[0].timer is None
+
+
+class TestRepeatFilter:
+    def test_repeats_run_end(self):
+        handler = ListHandler()
+        handler.addFilter(RepeatFilter(handler))
+
+        for msg, args in [('a %s', (1,))] * 5 + [('a %s', (2,))] * 2 + [('b', None)]:
+            handler.handle(make_record(msg, args))
+
+        assert [x.getMessage() for x in handler.records] == [
+            'a 1', 'last message repeated 4 times', 'a 2', 'last message repeated 1 times', 'b'
+        ]
+
+    def test_repeats_uncomparable_args(self):
+        class Uncomparable:
+            def __eq__(self, other):
+                raise ValueError('ambiguous comparison')
+
+        handler = ListHandler()
+        handler.addFilter(RepeatFilter(handler))
+
+        for _ in range(2):
+            handler.handle(make_record('value %s', (Uncomparable(),)))
+
+        assert len(handler.records) == 2
+
+    def test_repeats_timeout(self):
+        handler = ListHandler()
+        handler.addFilter(RepeatFilter(handler, repeat_timeout=0.05))
+
+        for _ in range(3):
+            handler.handle(make_record('a'))
+
+        time.sleep(0.5)
+
+        assert [x.getMessage() for x in handler.records] == ['a', 'last message repeated 2 times']
+
+    def test_repeats_close(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = LoggerHandlerUtil().create_handler('file', {'filename': str(f), 'format': '%(message)s',
+                                                              'collapse_repeats': True})
+
+        for _ in range(5):
+            handler.handle(make_record('retry'))
+
+        handler.close()
+
+        assert f.read().splitlines() == ['retry', 'last message repeated 4 times']
+        assert handler.filters[0].timer is None
+
+
+class TestSetupHandlersFilters:
+    def test_setup_handlers_filters(self):
+        handler = LoggerHandlerUtil().setup_handlers({
+            'stream': {'sample_rate': 0.5, 'rate_limit': '10/s', 'collapse_repeats': True}
+        })[0]
+
+        assert [type(x) for x in handler.filters] == [RepeatFilter, SampleFilter, RateLimitFilter]
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_formatter
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for high throughput logging formatters
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import sys
+import json
+import types
+import logging
+
+import pytest
+
+from pynata.logger.common import LoggerCommon
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.formatter import FastFormatter, JsonFormatter
+
+
+def make_record(msg, args=None, exc_info=None):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 10, msg, args, exc_info)
+
+
+@pytest.fixture(scope='function')
+def reset_formatter():
+    log_format, log_date_format = LoggerCommon.log_format, LoggerCommon.log_date_format
+    yield
+    LoggerCommon.set_log_format(log_format)
+    LoggerCommon.set_log_date_format(log_date_format)
+    LoggerCommon.set_fast_formatter(False)
+
+
+class TestFastFormatter:
+    @pytest.mark.parametrize('fmt,datefmt', [
+        (LoggerCommon.log_format, LoggerCommon.log_date_format),
+        (LoggerCommon.log_format, None),
+        ('%(levelname)-8s %(lineno)04d %(name)r %(message)s 100%%', None),
+        ('%(message)s', None),
+        ('%%(name)s %(message)s', None),
+        ('%%%(name)s %%%%(levelname)s %(message)s', None),
+    ])
+    def test_matches_formatter(self, fmt, datefmt):
+        record = make_record('message %s', ('arg',))
+
+        assert FastFormatter(fmt, datefmt).format(record) == logging.Formatter(fmt, datefmt).format(record)
+
+    def test_exception(self):
+        try:
+            raise ValueError('error')
+        except ValueError:
+            record = make_record('message', exc_info=sys.exc_info())
+
+        assert FastFormatter().format(record) == logging.Formatter().format(record)
+
+    def test_time_cache(self):
+        formatter = FastFormatter('%(asctime)s', '%S')
+        record_a, record_b = make_record('a'), make_record('b')
+        record_a.created, record_b.created = 61.1, 61.9
+
+        assert formatter.format(record_a) == formatter.format(record_b) == '01'
+
+        record_b.created = 62.0
+
+        assert formatter.format(record_b) == '02'
+
+
+@pytest.mark.usefixtures('reset_formatter')
+class TestSharedFormatter:
+    def test_shared_formatter(self):
+        LoggerCommon.set_fast_formatter(True)
+        formatter = LoggerCommon.get_formatter()
+
+        assert isinstance(formatter, FastFormatter)
+        assert LoggerCommon.get_formatter() is formatter
+
+        LoggerCommon.set_log_format('%(message)s')
+
+        assert LoggerCommon.get_formatter() is not formatter
+        assert LoggerCommon.get_formatter()._fmt == '%(message)s'
+
+    def test_formatter_not_shared(self):
+        assert not isinstance(LoggerCommon.get_formatter(), FastFormatter)
+        assert LoggerCommon.get_formatter() is not LoggerCommon.get_formatter()
+
+
+class TestJsonFormatter:
+    def test_json_fields(self):
+        record = make_record('message %s', ('arg',))
+        data = json.loads(JsonFormatter(['name', 'levelname', 'message', 'args']).format(record))
+
+        assert data == {'name': __name__, 'levelname': 'INFO', 'message': 'message arg', 'args': "('arg',)"}
+
+    def test_json_exception(self):
+        try:
+            raise ValueError('error')
+        except ValueError:
+            record = make_record('message', exc_info=sys.exc_info())
+
+        data = json.loads(JsonFormatter().format(record))
+
+        assert sorted(data) == ['asctime', 'exc_text', 'levelname', 'message', 'name']
+        assert data['exc_text'].endswith('ValueError: error')
+
+    @pytest.mark.parametrize('serializer', ['orjson', 'ujson'])
+    def test_json_fallback(self, monkeypatch, serializer):
+        monkeypatch.setitem(sys.modules, serializer, None)
+        record = make_record('message "quoted"')
+
+        assert json.loads(JsonFormatter(['message']).format(record)) == {'message': 'message "quoted"'}
+
+    def test_json_orjson_big_int(self, monkeypatch):
+        def dumps(obj):
+            raise TypeError('Integer exceeds 64-bit range')
+
+        monkeypatch.setitem(sys.modules, 'orjson', types.SimpleNamespace(dumps=dumps))
+        record = make_record('message')
+        record.big = 2 ** 70
+
+        assert json.loads(JsonFormatter(['message', 'big']).format(record)) == {'message': 'message', 'big': 2 ** 70}
+
+
+@pytest.mark.usefixtures('reset_formatter')
+class TestJsonLogFormat:
+    def test_set_log_format_json(self):
+        LoggerCommon.set_log_format('json')
+        LoggerCommon.set_log_fields(['name', 'message'])
+
+        formatter = LoggerCommon.get_formatter()
+
+        assert isinstance(formatter, JsonFormatter) and formatter.fields == ('name', 'message')
+
+    def test_handler_format_json(self):
+        handler = LoggerHandlerUtil().setup_handlers({'stream': {'format': 'json', 'fields': ['message']}})[0]
+
+        assert isinstance(handler.formatter, JsonFormatter)
+        assert json.loads(handler.format(make_record('message'))) == {'message': 'message'}
@@ -97,6 +97,30 @@ class TestGetHandler:
         with pytest.raises(ValueError):
             log_handler_util.get_handler('x')
 
+    def test_register_handler(self, log_handler_util, monkeypatch):
+        monkeypatch.setattr(LoggerHandlerUtil, 'handler_mapping', dict(LoggerHandlerUtil.handler_mapping))
+        monkeypatch.setattr(LoggerHandlerUtil, 'handler_classes', {})
+
+        log_handler_util.register_handler('custom', 'logging.handlers:BufferingHandler')
+
+        assert 'custom' not in LoggerHandlerUtil.handler_classes
+        assert isinstance(log_handler_util.get_handler('custom', capacity=10), logging.handlers.BufferingHandler)
+        assert LoggerHandlerUtil.handler_classes['custom'] is logging.handlers.BufferingHandler
+
+    def test_entry_points(self, log_handler_util, monkeypatch):
+        import importlib.metadata
+
+        ep = importlib.metadata.EntryPoint('plugin', 'logging:NullHandler', LoggerHandlerUtil.entry_point_group)
+
+        monkeypatch.setattr(LoggerHandlerUtil, 'handler_mapping', dict(LoggerHandlerUtil.handler_mapping))
+        monkeypatch.setattr(LoggerHandlerUtil, 'handler_classes', {})
+        monkeypatch.setattr(LoggerHandlerUtil, 'entry_points_loaded', False)
+        monkeypatch.setattr(importlib.metadata, 'entry_points',
+                            lambda: importlib.metadata.EntryPoints([ep]))
+
+        assert isinstance(log_handler_util.get_handler('plugin'), logging.NullHandler)
+        assert LoggerHandlerUtil.entry_points_loaded
+
 
 class TestSetHandlerLevel:
     def test_set_handler_level(self, log_handler_util):
@@ -158,3 +182,41 @@ class TestRemoveHandler:
         log_handler_util.remove_handler(logger, handler)
 
         assert len(logger.handlers) == 0
+
+
+class TestSharedHandlers:
+    def test_setup_handlers_shared(self, log_handler_util, tmpdir):
+        f = tmpdir.join('temp_file')
+
+        h1 = log_handler_util.setup_handlers({'file': {'filename': str(f)}}, shared=True)[0]
+        h2 = log_handler_util.setup_handlers({'file': {'filename': str(f)}}, shared=True)[0]
+        h3 = log_handler_util.setup_handlers({'file': {'filename': str(f), 'log_level': 'error'}}, shared=True)[0]
+
+        assert h1 is h2 and h1 is not h3
+        assert log_handler_util.handler_refs[h1][1] == 2
+
+        log_handler_util.close_handler(h1)
+
+        assert h1.stream is not None
+
+        log_handler_util.close_handler(h2)
+        log_handler_util.close_handler(h3)
+
+        assert h1.stream is None and h3.stream is None
+        assert h1 not in log_handler_util.handler_refs and h3 not in log_handler_util.handler_refs
+
+    def test_setup_handlers_shared_config_reused(self, log_handler_util, tmpdir):
+        config = {'file': {'filename': str(tmpdir.join('temp_file')), 'log_level': 'info'}}
+        handlers = [log_handler_util.setup_handlers(config, shared=True)[0] for _ in range(3)]
+
+        assert handlers[0] is handlers[1] is handlers[2] and handlers[0].level == logging.INFO
+        assert config['file']['log_level'] == 'info'
+
+        for h in handlers:
+            log_handler_util.close_handler(h)
+
+    def test_setup_handlers_not_shared(self, log_handler_util):
+        h1 = log_handler_util.setup_handlers({'stream': {}})[0]
+        h2 = log_handler_util.setup_handlers({'stream': {}})[0]
+
+        assert h1 is not h2
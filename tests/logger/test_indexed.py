@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_indexed
+~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for rotating file logging handlers with sidecar time index
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import logging
+import datetime
+import logging.handlers
+
+import pytest
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.indexed import (ENTRY_BLOCK, ENTRY_RECORD, DurableIndexedRotatingFileHandler,
+                                   IndexedRotatingFileHandler, IndexedTimedRotatingFileHandler, get_index_dir,
+                                   get_index_filename, main, parse_time, query, read_index)
+
+
+def make_record(msg, created, level=logging.INFO):
+    record = logging.LogRecord(__name__, level, __file__, 0, msg, None, None)
+    record.created = created
+
+    return record
+
+
+def write_records(handler, count, level_every=10):
+    for i in range(count):
+        level = logging.ERROR if i % level_every == 0 else logging.INFO
+        handler.handle(make_record('record {:04d}'.format(i), 1000.0 + i, level))
+
+
+class TestIndexedRotatingFileHandler:
+    def test_create_handler(self, tmpdir):
+        util = LoggerHandlerUtil()
+        f = str(tmpdir.join('temp_file'))
+
+        assert type(util.create_handler('rotatingfile', {'filename': f, 'index': False})) is \
+            logging.handlers.RotatingFileHandler
+        assert isinstance(util.create_handler('rotatingfile', {'filename': f, 'index': True}),
+                          IndexedRotatingFileHandler)
+        assert isinstance(util.create_handler('timedrotatingfile', {'filename': f, 'index': {'records': 10}}),
+                          IndexedTimedRotatingFileHandler)
+        assert isinstance(util.create_handler('rotatingfile', {'filename': f, 'index': True, 'durability': 'always'}),
+                          DurableIndexedRotatingFileHandler)
+
+        with pytest.raises(ValueError):
+            util.create_handler('file', {'filename': f, 'index': True})
+
+        with pytest.raises(ValueError):
+            IndexedRotatingFileHandler(f, index={'lines': 10})
+
+    def test_index_entries(self, tmpdir):
+        f = str(tmpdir.join('temp_file'))
+        handler = IndexedRotatingFileHandler(f, index={'records': 10, 'level': 'error'})
+
+        write_records(handler, 25)
+        handler.close()
+
+        index_level, entries = read_index(get_index_filename(f, os.stat(f)))
+        blocks = [x for x in entries if x[0] == ENTRY_BLOCK]
+        records = [x for x in entries if x[0] == ENTRY_RECORD]
+
+        assert index_level == logging.ERROR
+        assert [(x[1], x[2], x[3]) for x in blocks] == [(1000.0, 1009.0, logging.ERROR),
+                                                        (1010.0, 1019.0, logging.ERROR),
+                                                        (1020.0, 1024.0, logging.ERROR)]
+        assert [x[1] for x in records] == [1000.0, 1010.0, 1020.0]
+
+        with open(f, 'rb') as log:
+            data = log.read()
+
+        assert sum(x[5] for x in blocks) == len(data)
+        assert data[records[1][4]:records[1][4] + records[1][5]] == b'record 0010\n'
+
+    def test_rotation(self, tmpdir):
+        f = str(tmpdir.join('temp_file'))
+        handler = IndexedRotatingFileHandler(f, maxBytes=120, backupCount=2, index={'records': 4})
+
+        write_records(handler, 40)
+        handler.close()
+
+        generations = [f, f + '.1', f + '.2']
+        index_files = {get_index_filename(f, os.stat(x)) for x in generations}
+
+        assert {os.path.join(get_index_dir(f), x) for x in os.listdir(get_index_dir(f))} == index_files
+
+        expected = []
+
+        for path in reversed(generations):
+            with open(path) as log:
+                expected.extend(log.read().splitlines())
+
+        assert ''.join(query(f)).splitlines() == expected
+
+    def test_query(self, tmpdir):
+        f = str(tmpdir.join('temp_file'))
+        handler = IndexedRotatingFileHandler(f, maxBytes=300, backupCount=5, index={'records': 5})
+
+        write_records(handler, 60)
+
+        errors = ''.join(query(f, level='error')).splitlines()
+        in_range = ''.join(query(f, start=1020.0, end=1029.0)).splitlines()
+        errors_in_range = ''.join(query(f, start=1020.0, end=1039.0, level='error')).splitlines()
+
+        assert errors == ['record {:04d}'.format(x) for x in range(0, 60, 10)]
+        assert set('record {:04d}'.format(x) for x in range(20, 30)) <= set(in_range)
+        assert len(in_range) <= 20
+        assert errors_in_range == ['record 0020', 'record 0030']
+
+        tail = ''.join(query(f, start=1058.0)).splitlines()
+
+        assert 'record 0059' in tail
+
+        handler.close()
+
+    def test_main(self, tmpdir, capsys):
+        f = str(tmpdir.join('temp_file'))
+        handler = IndexedRotatingFileHandler(f, maxBytes=200, backupCount=5)
+
+        write_records(handler, 30)
+        handler.close()
+
+        main([f, '--level', 'error', '--start', '1005', '--end', '1025'])
+
+        assert capsys.readouterr().out.splitlines() == ['record 0010', 'record 0020']
+
+
+class TestParseTime:
+    def test_parse_time(self):
+        assert parse_time('1000.5') == 1000.5
+        assert parse_time('2019-01-01T00:00:00+00:00') == \
+            datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_lazy
+~~~~~~~~~~~~~~~~~~~~~~
+Unittests for lazy message evaluation
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import io
+
+import pytest
+
+from pynata.logger.lazy import Lazy
+from pynata.logger.logger import LoggerUtil
+
+
+@pytest.fixture(scope='class')
+def log_util():
+    return LoggerUtil()
+
+
+@pytest.fixture(scope='function')
+def reset_logger(log_util):
+    yield
+    log_util.remove_logger(__name__)
+
+
+class Payload:
+    def __init__(self):
+        self.calls = 0
+
+    def dump(self, value='body'):
+        self.calls += 1
+        return value
+
+
+@pytest.mark.usefixtures('reset_logger')
+class TestLazyLogger:
+    def test_logger_level(self, log_util):
+        payload, stream = Payload(), io.StringIO()
+        log_util.setup_logger(__name__, logger_level='info',
+                              handler_config={'stream': {'stream': stream, 'format': '%(message)s'}})
+        log = log_util.get_lazy_logger(__name__)
+
+        log.debug(lambda: 'x %s' % payload.dump())
+        log.debug('x %s', Lazy(payload.dump))
+        log.info('y %s %s', Lazy(payload.dump, 'lazy'), 1)
+        log.info(lambda: 'z %s' % payload.dump())
+
+        assert payload.calls == 2
+        assert stream.getvalue().splitlines() == ['y lazy 1', 'z body']
+
+    def test_handler_level(self, log_util):
+        payload = Payload()
+        logger = log_util.setup_logger(__name__, logger_level='debug',
+                                       handler_config={'stream': {'stream': io.StringIO(), 'log_level': 'warning'}})
+        log = log_util.get_lazy_logger(logger)
+        logger.propagate = False
+
+        log.debug('x %s', Lazy(payload.dump))
+
+        assert payload.calls == 0
+        assert not log.is_enabled(10)
+
+        log_util.handler.set_handler_log_level(logger.handlers[0], 'debug')
+        log.debug('x %s', Lazy(payload.dump))
+
+        assert payload.calls == 1
+        assert log.is_enabled(10)
+
+    def test_caller(self, log_util):
+        stream = io.StringIO()
+        log_util.setup_logger(__name__, logger_level='info',
+                              handler_config={'stream': {'stream': stream, 'format': '%(filename)s %(funcName)s'}})
+
+        log_util.get_lazy_logger(__name__).info('message')
+
+        assert stream.getvalue().strip() == 'test_lazy.py test_caller'
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_listener
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for queue based logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import queue
+import logging
+
+import pytest
+
+from pynata.logger.listener import LoggerQueueListener, OverflowQueueHandler
+
+
+def make_record(msg):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 0, msg, None, None)
+
+
+class TestOverflowQueueHandler:
+    def test_overflow_invalid(self):
+        with pytest.raises(ValueError):
+            OverflowQueueHandler(queue.Queue(), 'invalid')
+
+    def test_overflow_drop_newest(self):
+        handler = OverflowQueueHandler(queue.Queue(maxsize=2), 'drop_newest')
+
+        for msg in ('a', 'b', 'c'):
+            handler.emit(make_record(msg))
+
+        assert handler.dropped == 1
+        assert [handler.queue.get_nowait().msg for _ in range(2)] == ['a', 'b']
+
+    def test_overflow_drop_oldest(self):
+        handler = OverflowQueueHandler(queue.Queue(maxsize=2), 'drop_oldest')
+
+        for msg in ('a', 'b', 'c'):
+            handler.emit(make_record(msg))
+
+        assert handler.dropped == 1
+        assert [handler.queue.get_nowait().msg for _ in range(2)] == ['b', 'c']
+
+
+class TestLoggerQueueListener:
+    def test_listener_stop_drains_queue(self):
+        records = []
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                records.append(record.getMessage())
+
+        queue_obj = queue.Queue(maxsize=100)
+        handler = OverflowQueueHandler(queue_obj)
+        listener = LoggerQueueListener(queue_obj, [ListHandler()])
+        listener.start()
+
+        for i in range(50):
+            handler.emit(make_record(str(i)))
+
+        listener.stop()
+
+        assert records == [str(i) for i in range(50)]
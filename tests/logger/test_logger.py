@@ -9,11 +9,45 @@ Unittests for LoggerUtil class
 :license: MPL 2.0, see LICENSE for more details
 """
 
+import json
+import time
 import logging
+import threading
+import logging.handlers
+import multiprocessing
 
 import pytest
 
 from pynata.logger.logger import LoggerUtil
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.filters import RateLimitFilter
+from pynata.logger.formatter import JsonFormatter
+
+
+class SlowHandler(logging.NullHandler):
+    def flush(self):
+        time.sleep(2)
+
+
+class BlockingFilter(logging.Filter):
+    def __init__(self):
+        super().__init__()
+
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def filter(self, record):
+        self.entered.set()
+        self.released.wait(5)
+
+        return True
+
+
+def log_worker(writer_queue, worker_id):
+    logger = LoggerUtil().setup_logger('worker', logger_level='info', writer_queue=writer_queue)
+
+    for i in range(50):
+        logger.info('worker %d record %d', worker_id, i)
 
 
 @pytest.fixture(scope='class')
@@ -35,6 +69,15 @@ class TestGetLogger:
         assert logger_a == logger_b and logger_b.name == __name__
 
 
+@pytest.fixture(scope='function')
+def reset_log_format(log_util):
+    log_format, log_date_format = log_util.log_format, log_util.log_date_format
+    yield
+    log_util.set_log_format(log_format)
+    log_util.set_log_date_format(log_date_format)
+
+
+@pytest.mark.usefixtures('reset_log_format')
 class TestSetLogFormat:
     def test_set_log_msg_format(self, log_util):
         log_util.set_log_format('sample')
@@ -120,6 +163,16 @@ class TestSetupLogger:
         assert logger_a == logger_b and len(logger_b.handlers) == 2
         assert logger_a.handlers[0] == handler_a
 
+    def test_setup_logger_config_reused(self, log_util):
+        config = {'stream': {'format': 'json', 'rate_limit': '1/s'}}
+        handlers = [log_util.setup_logger(x, handler_config=config).handlers[0] for x in (__name__, __name__ + '.b')]
+
+        assert all(isinstance(x.formatter, JsonFormatter) for x in handlers)
+        assert all([type(f) for f in x.filters] == [RateLimitFilter] for x in handlers)
+        assert config == {'stream': {'format': 'json', 'rate_limit': '1/s'}}
+
+        log_util.remove_logger(__name__ + '.b')
+
 
 @pytest.mark.usefixtures('reset_logger')
 class TestLogging:
@@ -191,3 +244,282 @@ class TestRemoveLoggerHandlers:
         log_util.remove_logger_handlers(logger)
 
         assert len(logger.handlers) == 0
+
+    def test_remove_logger_handlers_multiple(self, log_util, tmpdir):
+        logger = log_util.setup_logger(__name__, handler_config={'stream': {}, 'null': {},
+                                                                 'file': {'filename': str(tmpdir.join('f'))}})
+        handlers = list(logger.handlers)
+
+        log_util.remove_logger_handlers(logger)
+
+        assert len(logger.handlers) == 0
+        assert handlers[2].stream is None
+
+
+@pytest.mark.usefixtures('reset_logger')
+class TestSetupLoggerAsync:
+    def test_setup_logger_async(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        logger = log_util.setup_logger(__name__, logger_level=10, async_mode=True,
+                                       handler_config={'file': {'filename': str(f)}})
+
+        assert len(logger.handlers) == 1
+        assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+        assert len(log_util.listeners[__name__]) == 1
+
+        for i in range(100):
+            logger.info('record %d', i)
+
+        log_util.remove_logger(__name__)
+
+        assert __name__ not in log_util.listeners
+        assert len(f.readlines()) == 100
+
+
+class TestMultiprocessWriter:
+    def test_writer(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        writer_queue = log_util.start_writer({'file': {'filename': str(f), 'format': '%(message)s'}},
+                                             mp_context='spawn')
+
+        workers = [multiprocessing.get_context('spawn').Process(target=log_worker, args=(writer_queue, i))
+                   for i in range(4)]
+
+        for p in workers:
+            p.start()
+
+        for p in workers:
+            p.join()
+
+        log_util.stop_writer(writer_queue)
+
+        lines = f.read().splitlines()
+
+        assert len(log_util.writers) == 0
+        assert sorted(lines) == sorted('worker {} record {}'.format(i, j) for i in range(4) for j in range(50))
+
+
+class TestSetupLoggerShared:
+    def test_setup_logger_shared_handlers(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        loggers = [log_util.setup_logger('shared{}'.format(i), shared_handlers=True,
+                                         handler_config={'file': {'filename': str(f)}}) for i in range(3)]
+
+        handler = loggers[0].handlers[0]
+
+        assert all(x.handlers == [handler] for x in loggers)
+
+        log_util.remove_logger('shared0')
+        log_util.remove_logger('shared1')
+
+        assert handler.stream is not None
+
+        log_util.remove_logger('shared2')
+
+        assert handler.stream is None
+
+
+@pytest.mark.usefixtures('reset_logger')
+class TestGetStats:
+    def test_get_stats(self, log_util):
+        logger = log_util.setup_logger(__name__, logger_level='info', handler_config={'null': {}})
+
+        for i in range(10):
+            logger.info('record %d', i)
+
+        stats = log_util.get_stats()[__name__]
+
+        assert len(stats) == 1
+        assert stats[0]['type'] == 'NullHandler'
+        assert stats[0]['emitted'] == 10
+
+    def test_get_stats_async(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        logger = log_util.setup_logger(__name__, logger_level='info', async_mode=True,
+                                       handler_config={'file': {'filename': str(f)}})
+
+        logger.info('record')
+        log_util.listeners[__name__][0].queue.join()
+
+        stats = log_util.get_stats()[__name__]
+
+        assert [x['type'] for x in stats] == ['OverflowQueueHandler', 'FileHandler']
+        assert stats[1]['listener'] is True
+        assert stats[1]['emitted'] == 1
+
+    def test_stats_export(self, log_util):
+        exported = []
+        log_util.setup_logger(__name__, handler_config={'null': {}})
+        log_util.start_stats_export(exported.append, interval=0.01)
+
+        while not exported:
+            pass
+
+        log_util.stop_stats_export()
+
+        assert __name__ in exported[0]
+        assert log_util.stats_export is None
+
+
+class TestShutdown:
+    def test_shutdown(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        sync_logger = log_util.setup_logger('shutdown0', logger_level='info', handler_config={'null': {}})
+        async_logger = log_util.setup_logger('shutdown1', logger_level='info', async_mode=True,
+                                             handler_config={'file': {'filename': str(f), 'log_level': 'info'}})
+        unmanaged = logging.NullHandler()
+        sync_logger.addHandler(unmanaged)
+
+        for i in range(100):
+            async_logger.info('record %d', i)
+
+        assert log_util.shutdown(timeout=5) == []
+        assert sync_logger.handlers == [unmanaged]
+        assert async_logger.handlers == []
+        assert 'shutdown1' not in log_util.listeners
+        assert len(f.readlines()) == 100
+
+        sync_logger.removeHandler(unmanaged)
+
+    def test_shutdown_deadline(self, log_util, monkeypatch):
+        monkeypatch.setattr(LoggerHandlerUtil, 'handler_mapping', dict(LoggerHandlerUtil.handler_mapping))
+        monkeypatch.setattr(LoggerHandlerUtil, 'handler_classes', {})
+        LoggerHandlerUtil.register_handler('slow', SlowHandler)
+
+        logger = log_util.setup_logger('shutdown2', handler_config={'slow': {}, 'null': {}})
+        slow = logger.handlers[0]
+
+        start = time.monotonic()
+
+        assert log_util.shutdown(timeout=0.2) == [slow]
+        assert time.monotonic() - start < 1
+        assert logger.handlers == []
+
+
+@pytest.mark.usefixtures('reset_logger')
+class TestReconfigure:
+    def test_reconfigure_level(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        config = {'file': {'filename': str(f), 'format': '%(message)s'}, 'null': {}}
+
+        log_util.reconfigure({__name__: {'logger_level': 'info', 'handler_config': config}})
+
+        logger = logging.getLogger(__name__)
+        handlers = list(logger.handlers)
+        logger.info('first')
+
+        config = {'file': {'filename': str(f), 'format': '%(message)s', 'log_level': 'error'}, 'null': {}}
+        log_util.reconfigure({__name__: {'logger_level': 'debug', 'handler_config': config}})
+
+        logger.info('second')
+        logger.error('third')
+
+        assert logger.handlers == handlers
+        assert logger.level == logging.DEBUG
+        assert handlers[0].level == logging.ERROR
+        assert handlers[0].stream is not None
+        assert f.read().splitlines() == ['first', 'third']
+
+    def test_reconfigure_swap(self, log_util, tmpdir, monkeypatch):
+        monkeypatch.setattr(LoggerUtil, 'replaced_close_delay', 0)
+        f = tmpdir.join('temp_file')
+        unmanaged = logging.NullHandler()
+
+        log_util.reconfigure({__name__: {'handler_config': {'file': {'filename': str(f), 'format': '%(message)s'}}}})
+
+        logger = logging.getLogger(__name__)
+        logger.addHandler(unmanaged)
+        old = logger.handlers[0]
+        logger.warning('first')
+
+        log_util.reconfigure({__name__: {'handler_config': {'file': {'filename': str(f), 'format': '>%(message)s'}}}})
+        logger.warning('second')
+
+        assert logger.handlers[0] is unmanaged and len(logger.handlers) == 2
+        assert old.stream is None
+        assert f.read().splitlines() == ['first', '>second']
+
+    def test_reconfigure_async(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        logger = log_util.setup_logger(__name__, async_mode=True, handler_config={'null': {}})
+        queue_handler = logger.handlers[0]
+
+        log_util.reconfigure({__name__: {'handler_config': {'file': {'filename': str(f)}}}})
+
+        for i in range(10):
+            logger.warning('record %d', i)
+
+        listener = log_util.listeners[__name__][0]
+
+        assert logger.handlers == [queue_handler]
+        assert [type(x) for x in listener.handlers] == [logging.FileHandler]
+
+        log_util.remove_logger(__name__)
+
+        assert len(f.readlines()) == 10
+
+    def test_reconfigure_concurrent_emit(self, log_util, tmpdir, monkeypatch):
+        monkeypatch.setattr(LoggerUtil, 'replaced_close_delay', 0.1)
+        f = tmpdir.join('temp_file')
+
+        log_util.reconfigure({__name__: {'handler_config': {'file': {'filename': str(f), 'format': '%(message)s'}}}})
+
+        logger = logging.getLogger(__name__)
+        old, blocking = logger.handlers[0], BlockingFilter()
+        old.addFilter(blocking)
+
+        thread = threading.Thread(target=logger.warning, args=('first',))
+        thread.start()
+        blocking.entered.wait(5)
+
+        log_util.reconfigure({__name__: {'handler_config': {'file': {'filename': str(f), 'format': '>%(message)s'}}}})
+        blocking.released.set()
+        thread.join()
+
+        deadline = time.monotonic() + 5
+
+        while old.stream is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert old.stream is None
+        assert f.read().splitlines() == ['first']
+
+    def test_reconfigure_async_concurrent_emit(self, log_util, tmpdir):
+        f = tmpdir.join('temp_file')
+        config = {'file': {'filename': str(f), 'format': '%(message)s'}}
+        logger = log_util.setup_logger(__name__, async_mode=True, handler_config=config)
+        listener = log_util.listeners[__name__][0]
+        old, blocking = listener.handlers[0], BlockingFilter()
+        old.addFilter(blocking)
+
+        logger.warning('first')
+        blocking.entered.wait(5)
+
+        log_util.reconfigure({__name__: {'handler_config': {'file': {'filename': str(f), 'format': '>%(message)s'}}}})
+        blocking.released.set()
+        logger.warning('second')
+        log_util.remove_logger(__name__)
+
+        assert old.stream is None
+        assert f.read().splitlines() == ['first', '>second']
+
+    def test_watch_config(self, log_util, tmpdir):
+        f, config_file = tmpdir.join('temp_file'), tmpdir.join('config.json')
+        config_file.write(json.dumps({__name__: {'logger_level': 'info', 'handler_config': {'null': {}}}}))
+
+        log_util.watch_config(str(config_file), interval=0.01)
+        logger = logging.getLogger(__name__)
+
+        while logger.level != logging.INFO:
+            time.sleep(0.01)
+
+        config_file.write(json.dumps({__name__: {'logger_level': 'info',
+                                                 'handler_config': {'file': {'filename': str(f)}}}}))
+
+        while not isinstance(logger.handlers[0], logging.FileHandler):
+            time.sleep(0.01)
+
+        log_util.stop_config_watch()
+
+        assert len(logger.handlers) == 1
+        assert log_util.config_watch is None
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_mmapring
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for memory mapped circular file logging handler
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+
+from pynata.logger.mmapring import MmapRingHandler, main, read_ring
+
+
+def make_record(msg):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 0, msg, None, None)
+
+
+class TestMmapRingHandler:
+    def test_read_ring(self, tmpdir):
+        f = tmpdir.join('ring')
+        handler = MmapRingHandler(str(f), capacity=1024)
+
+        for i in range(10):
+            handler.emit(make_record('record {}'.format(i)))
+
+        handler.close()
+
+        assert list(read_ring(str(f))) == ['record {}'.format(i) for i in range(10)]
+
+    def test_read_ring_wrapped(self, tmpdir):
+        f = tmpdir.join('ring')
+        handler = MmapRingHandler(str(f), capacity=1000)
+
+        for i in range(1000):
+            handler.emit(make_record('record {:04d}'.format(i)))
+
+        assert handler.generation > 0
+        assert f.size() == 1032
+
+        records = list(read_ring(str(f)))
+
+        assert records == ['record {:04d}'.format(i) for i in range(1000 - len(records), 1000)]
+        assert 40 < len(records) < 50
+
+        handler.close()
+
+    def test_reopen(self, tmpdir, capsys):
+        f = tmpdir.join('ring')
+
+        for msg in ('a', 'b'):
+            handler = MmapRingHandler(str(f), capacity=1024)
+            handler.emit(make_record(msg))
+            handler.close()
+
+        main([str(f)])
+
+        assert capsys.readouterr().out == 'a\nb\n'
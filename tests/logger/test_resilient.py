@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_resilient
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for socket logging handlers with reconnect backoff and disk spill
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import os
+import time
+import pickle
+import socket
+import struct
+import logging
+import threading
+
+from pynata.logger.resilient import ResilientSocketHandler, SegmentSpool
+
+
+def make_record(msg):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 0, msg, None, None)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Collector:
+    def __init__(self, port):
+        self.messages = []
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', port))
+        self.server.listen()
+
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        conn, _ = self.server.accept()
+
+        with conn, conn.makefile('rb') as f:
+            while True:
+                header = f.read(4)
+
+                if len(header) < 4:
+                    return
+
+                self.messages.append(pickle.loads(f.read(struct.unpack('>L', header)[0]))['msg'])
+
+    def close(self):
+        self.server.close()
+
+
+class TestSegmentSpool:
+    def test_spool_replay(self, tmpdir):
+        spool = SegmentSpool(str(tmpdir), segment_bytes=10)
+        frames = [struct.pack('>L', 3) + b'abc', struct.pack('>L', 2) + b'de', struct.pack('>L', 1) + b'f']
+
+        for frame in frames:
+            spool.append(frame)
+
+        assert len(spool.segments) == 2
+
+        sent = []
+        spool.replay(sent.append)
+
+        assert sent == frames and not spool.pending and tmpdir.listdir() == []
+
+    def test_spool_max_bytes(self, tmpdir):
+        spool = SegmentSpool(str(tmpdir), max_bytes=20, segment_bytes=10)
+
+        for i in range(5):
+            spool.append(struct.pack('>L', 6) + str(i).encode() * 6)
+
+        sent = []
+        spool.replay(sent.append)
+
+        assert spool.dropped == 3 and [x[4:5] for x in sent] == [b'3', b'4']
+
+    def test_spool_recover(self, tmpdir):
+        spool = SegmentSpool(str(tmpdir))
+        spool.append(struct.pack('>L', 1) + b'a')
+        spool.close_writer()
+
+        sent = []
+        SegmentSpool(str(tmpdir)).replay(sent.append)
+
+        assert sent == [struct.pack('>L', 1) + b'a']
+
+    def test_spool_lazy_directory(self, tmpdir):
+        directory = tmpdir.join('spool')
+        spool = SegmentSpool(str(directory))
+
+        assert not directory.exists() and not spool.pending
+
+        spool.append(struct.pack('>L', 1) + b'a')
+
+        assert directory.exists() and spool.pending
+
+
+class TestResilientSocketHandler:
+    def test_spill_and_replay(self, tmpdir):
+        port = free_port()
+        handler = ResilientSocketHandler('127.0.0.1', port, spool_dir=str(tmpdir), retry_start=0.05, retry_max=0.1)
+
+        for i in range(5):
+            handler.handle(make_record(str(i)))
+
+        deadline = time.monotonic() + 5
+
+        while not handler.spool.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert handler.spool.pending
+
+        collector = Collector(port)
+
+        for i in range(5, 10):
+            handler.handle(make_record(str(i)))
+
+        while len(collector.messages) < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        handler.close()
+        collector.close()
+
+        assert collector.messages == [str(i) for i in range(10)]
+
+    def test_default_spool_dir(self, monkeypatch, tmpdir):
+        monkeypatch.setenv('HOME', str(tmpdir))
+        handler = ResilientSocketHandler('127.0.0.1', free_port(), retry_start=0.05)
+        handler.close()
+
+        assert handler.spool.directory.endswith('-{}'.format(os.getpid()))
+        assert not os.path.exists(handler.spool.directory)
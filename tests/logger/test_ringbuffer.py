@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_ringbuffer
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for in-process ring buffer logging handler
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+
+import pytest
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.ringbuffer import RingBufferHandler
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(msg, level=logging.DEBUG, name=__name__):
+    return logging.LogRecord(name, level, __file__, 0, msg, None, None)
+
+
+class TestRingBufferHandler:
+    def test_capacity(self):
+        target = ListHandler()
+        handler = RingBufferHandler(target, capacity=3)
+
+        for i in range(10):
+            handler.handle(make_record(str(i)))
+
+        assert target.records == []
+
+        handler.handle(make_record('error', logging.ERROR))
+
+        assert [x.msg for x in target.records] == ['7', '8', '9', 'error']
+
+        handler.handle(make_record('error', logging.ERROR))
+
+        assert len(target.records) == 5
+
+    def test_max_age(self):
+        target = ListHandler()
+        handler = RingBufferHandler(target, max_age=10)
+
+        for i in range(5):
+            record = make_record(str(i))
+            record.created = 100 + i * 5
+            handler.handle(record)
+
+        trigger = make_record('error', logging.ERROR)
+        trigger.created = 125
+
+        handler.handle(trigger)
+
+        assert [x.msg for x in target.records] == ['3', '4', 'error']
+
+    def test_partition_logger(self):
+        target = ListHandler()
+        handler = RingBufferHandler(target, partition='logger')
+
+        handler.handle(make_record('a', name='a'))
+        handler.handle(make_record('b', name='b'))
+        handler.handle(make_record('error', logging.ERROR, name='a'))
+
+        assert [x.msg for x in target.records] == ['a', 'error']
+
+    def test_partition_invalid(self):
+        with pytest.raises(ValueError):
+            RingBufferHandler(ListHandler(), partition='x')
+
+
+class TestSetupHandlersRingBuffer:
+    def test_setup_handlers_nested_target(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = LoggerHandlerUtil().setup_handlers({
+            'ringbuffer': {'capacity': 10, 'target': {'file': {'filename': str(f), 'format': '%(message)s'}}}
+        })[0]
+
+        handler.handle(make_record('debug'))
+        handler.handle(make_record('error', logging.ERROR))
+        handler.close()
+
+        assert f.read() == 'debug\nerror\n'
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_rotating
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for compressing rotating file logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import gzip
+import time
+import logging
+import threading
+
+import pytest
+
+from pynata.logger import rotating
+from pynata.logger.rotating import GzRotatingFileHandler, GzTimedRotatingFileHandler
+
+
+def make_record(msg):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 0, msg, None, None)
+
+
+class TestGzRotatingFileHandler:
+    def test_rollover_compressed(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = GzRotatingFileHandler(str(f), maxBytes=20, backupCount=2)
+
+        for msg in ('aaaaaaaa', 'bbbbbbbb', 'cccccccc', 'dddddddd', 'eeeeeeee'):
+            handler.emit(make_record(msg))
+
+        handler.close()
+
+        assert sorted(x.basename for x in tmpdir.listdir()) == ['temp_file', 'temp_file.1.gz', 'temp_file.2.gz']
+        assert gzip.open(str(tmpdir.join('temp_file.1.gz'))).read() == b'cccccccc\ndddddddd\n'
+        assert gzip.open(str(tmpdir.join('temp_file.2.gz'))).read() == b'aaaaaaaa\nbbbbbbbb\n'
+        assert f.read() == 'eeeeeeee\n'
+
+    def test_rollover_does_not_wait(self, tmpdir, monkeypatch):
+        f = tmpdir.join('temp_file')
+        release, compress_file = threading.Event(), rotating.compress_file
+
+        def slow_compress_file(source, dest, compression):
+            release.wait(5)
+            compress_file(source, dest, compression)
+
+        monkeypatch.setattr(rotating, 'compress_file', slow_compress_file)
+        handler = GzRotatingFileHandler(str(f), maxBytes=20, backupCount=3, max_compressions=2)
+        start = time.monotonic()
+
+        for msg in ('aaaaaaaa', 'bbbbbbbb', 'cccccccc', 'dddddddd', 'eeeeeeee', 'ffffffff', 'gggggggg'):
+            handler.emit(make_record(msg))
+
+        assert time.monotonic() - start < 1
+
+        release.set()
+        handler.close()
+
+        assert sorted(x.basename for x in tmpdir.listdir()) == ['temp_file', 'temp_file.1.gz', 'temp_file.2.gz',
+                                                                 'temp_file.3.gz']
+        assert gzip.open(str(tmpdir.join('temp_file.1.gz'))).read() == b'eeeeeeee\nffffffff\n'
+        assert gzip.open(str(tmpdir.join('temp_file.3.gz'))).read() == b'aaaaaaaa\nbbbbbbbb\n'
+        assert f.read() == 'gggggggg\n'
+
+    def test_compression_invalid(self, tmpdir):
+        with pytest.raises(ValueError):
+            GzRotatingFileHandler(str(tmpdir.join('temp_file')), compression='x')
+
+
+class TestGzTimedRotatingFileHandler:
+    def test_rollover_compressed(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = GzTimedRotatingFileHandler(str(f), backupCount=2)
+
+        handler.emit(make_record('aaaaaaaa'))
+        handler.doRollover()
+        handler.emit(make_record('bbbbbbbb'))
+        handler.close()
+
+        rotated = [x for x in tmpdir.listdir() if x.basename != 'temp_file']
+
+        assert len(rotated) == 1 and rotated[0].basename.endswith('.gz')
+        assert gzip.open(str(rotated[0])).read() == b'aaaaaaaa\n'
+        assert f.read() == 'bbbbbbbb\n'
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_sharded
+~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for per-thread sharded file handler and merge tool
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import logging
+import threading
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.sharded import ShardedFileHandler, get_shards, main, merge_shards
+
+
+def make_record(msg, args=None, level=logging.INFO):
+    return logging.LogRecord(__name__, level, __file__, 10, msg, args, None)
+
+
+class TestShardedFileHandler:
+    def test_threads(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = ShardedFileHandler(str(f), flush_interval=0)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+
+        def worker(i):
+            for j in range(100):
+                handler.handle(make_record('thread %d record %d', (i, j)))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        handler.close()
+
+        lines = [x.rstrip('\n') for x in merge_shards(str(f))]
+
+        assert 1 <= len(get_shards(str(f))) <= 4
+        assert sorted(lines) == sorted('thread {} record {}'.format(i, j) for i in range(4) for j in range(100))
+
+        for i in range(4):
+            assert [x for x in lines if x.startswith('thread {} '.format(i))] == \
+                ['thread {} record {}'.format(i, j) for j in range(100)]
+
+    def test_order_and_multiline(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = ShardedFileHandler(str(f), flush_interval=0)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        records = [make_record('first'), make_record('second\n\tindented'), make_record('third')]
+
+        for i, record in enumerate(records):
+            record.created = 100.0 + i
+
+        handler.handle(records[0])
+
+        t = threading.Thread(target=handler.handle, args=(records[1],))
+        t.start()
+        t.join()
+
+        handler.handle(records[2])
+        handler.close()
+
+        assert len(get_shards(str(f))) == 2
+        assert list(merge_shards(str(f))) == ['first\n', 'second\n\tindented\n', 'third\n']
+        assert next(merge_shards(str(f), keep_prefix=True)).startswith('100.000000 ')
+
+    def test_shard_reuse(self, tmpdir):
+        f = tmpdir.join('temp_file')
+        handler = ShardedFileHandler(str(f), flush_interval=0)
+
+        for i in range(3):
+            t = threading.Thread(target=handler.handle, args=(make_record('record'),))
+            t.start()
+            t.join()
+
+        handler.close()
+
+        assert len(get_shards(str(f))) == 1
+
+    def test_main(self, tmpdir, capsys):
+        f = tmpdir.join('temp_file')
+        handler = LoggerHandlerUtil().create_handler('shardedfile', {'filename': str(f), 'format': '%(message)s'})
+        handler.handle(make_record('record'))
+        handler.close()
+
+        main([str(f)])
+
+        assert capsys.readouterr().out == 'record\n'
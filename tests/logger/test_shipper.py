@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_shipper
+~~~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for batching HTTP log shipper
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import gzip
+import json
+import time
+import socket
+import logging
+import threading
+import http.server
+
+import pytest
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.shipper import BatchHTTPHandler
+
+
+class CollectorHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        self.server.requests.append((self.client_address, body.decode('utf-8')))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='function')
+def collector():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), CollectorHandler)
+    server.requests, server.statuses = [], []
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def make_record(msg):
+    return logging.LogRecord(__name__, logging.INFO, __file__, 0, msg, None, None)
+
+
+class TestBatchHTTPHandler:
+    def test_batches(self, collector):
+        handler = BatchHTTPHandler('127.0.0.1:{}'.format(collector.server_port), '/logs', batch_size=10,
+                                   flush_interval=60)
+
+        for i in range(25):
+            handler.handle(make_record(str(i)))
+
+        handler.close()
+
+        lines = [json.loads(x) for _, body in collector.requests for x in body.splitlines()]
+
+        assert [x['message'] for x in lines] == [str(i) for i in range(25)]
+        assert len(collector.requests) == 3 and len({x[0] for x in collector.requests}) == 1
+        assert handler.sent == 25 and handler.dropped == 0
+
+    def test_retry(self, collector):
+        collector.statuses = [503, 503]
+        handler = BatchHTTPHandler('127.0.0.1:{}'.format(collector.server_port), '/logs', compress=False,
+                                   backoff=0.01)
+
+        handler.handle(make_record('a'))
+        handler.flush()
+
+        deadline = time.monotonic() + 5
+
+        while handler.sent == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        handler.close()
+
+        assert len(collector.requests) == 3 and handler.sent == 1
+
+    def test_drop(self, collector):
+        collector.statuses = [400]
+        handler = BatchHTTPHandler('127.0.0.1:{}'.format(collector.server_port), '/logs', max_buffer=2,
+                                   flush_interval=60)
+
+        for i in range(3):
+            handler.handle(make_record(str(i)))
+
+        handler.close()
+
+        assert len(collector.requests) == 1 and handler.dropped == 3
+
+    def test_close_unreachable(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        handler = BatchHTTPHandler('127.0.0.1:{}'.format(port), '/logs', batch_size=10, flush_interval=60,
+                                   backoff=1.0)
+
+        for i in range(1000):
+            handler.handle(make_record(str(i)))
+
+        start = time.monotonic()
+        handler.close()
+
+        assert time.monotonic() - start < 2 and handler.dropped == 1000 and not handler.buffer
+
+    def test_close_timeout(self, collector):
+        handler = BatchHTTPHandler('127.0.0.1:{}'.format(collector.server_port), '/logs', flush_interval=60,
+                                   close_timeout=0)
+
+        for i in range(3):
+            handler.handle(make_record(str(i)))
+
+        handler.close()
+
+        assert collector.requests == [] and handler.dropped == 3
+
+
+class TestSetupHandlersBatchHTTP:
+    def test_default_format(self, collector):
+        handler = LoggerHandlerUtil().setup_handlers({
+            'batchhttp': {'host': '127.0.0.1:{}'.format(collector.server_port), 'url': '/'}
+        })[0]
+
+        assert json.loads(handler.format(make_record('a')))['message'] == 'a'
+
+        handler.close()
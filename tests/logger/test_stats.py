@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""
+tests.logger.test_stats
+~~~~~~~~~~~~~~~~~~~~~~~
+Unittests for runtime metrics of logging handlers
+
+:copyright: © 2019 Zsolt Mester
+:license: MPL 2.0, see LICENSE for more details
+"""
+
+import io
+import queue
+import logging
+import logging.handlers
+
+from pynata.logger.handler import LoggerHandlerUtil
+from pynata.logger.stats import HandlerStats, get_handler_stats
+
+
+def make_record(msg, level=logging.INFO):
+    return logging.LogRecord(__name__, level, __file__, 0, msg, None, None)
+
+
+class TestHandlerStats:
+    def test_counters(self):
+        handler = logging.StreamHandler(io.StringIO())
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.addFilter(lambda record: record.msg != 'skip')
+        stats = HandlerStats.install(handler)
+
+        for msg in ('first', 'skip', 'second'):
+            handler.handle(make_record(msg))
+            handler.format(make_record(msg))
+
+        assert stats.emitted == 2
+        assert stats.filtered == 1
+        assert stats.bytes == len('first\n') * 2 + len('skip\n') + len('second\n') * 2
+        assert sum(stats.histogram) == 3
+
+    def test_install_once(self):
+        handler = logging.NullHandler()
+
+        assert HandlerStats.install(handler) is HandlerStats.install(handler)
+
+    def test_get_handler_stats_queue(self):
+        handler = logging.handlers.QueueHandler(queue.Queue())
+        HandlerStats.install(handler)
+
+        for i in range(3):
+            handler.handle(make_record(str(i)))
+
+        stats = get_handler_stats(handler)
+
+        assert stats['type'] == 'QueueHandler'
+        assert stats['emitted'] == 3
+        assert stats['queue_depth'] == 3
+        assert sum(stats['latency_histogram_us'].values()) == 3
+
+    def test_create_handler_instrumented(self):
+        handler = LoggerHandlerUtil().create_handler('null', {})
+
+        assert isinstance(handler.handler_stats, HandlerStats)